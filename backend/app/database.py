@@ -1,21 +1,96 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import QueuePool
 import os
 
+from .models import Base
+
 # 获取当前目录和上级目录
 app_dir = os.path.dirname(os.path.abspath(__file__))
 backend_dir = os.path.dirname(app_dir)
 
-# 创建数据库引擎
-engine = create_engine(f'sqlite:///{os.path.join(backend_dir, "transcriptions.db")}', pool_pre_ping=True)
+# 创建数据库引擎，使用连接池复用连接，允许跨线程使用
+# 本地SQLite文件连接不会被服务端断开，因此不启用 pool_pre_ping，省去每次取连接时的 SELECT 1
+engine = create_engine(
+    f'sqlite:///{os.path.join(backend_dir, "transcriptions.db")}',
+    poolclass=QueuePool,
+    pool_size=10,
+    max_overflow=20,
+    connect_args={"check_same_thread": False}
+)
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_conn, _):
+    """新连接建立时启用WAL模式，读写互不阻塞，并放大页缓存"""
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256MB
+    cursor.execute("PRAGMA cache_size=-65536")  # 64MB
+    cursor.close()
+
+def _table_columns(conn, table):
+    """返回数据表现有的列名集合"""
+    return {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+def _has_unique_index(conn, table, column):
+    """判断某列上是否已有单列唯一索引（包括UNIQUE约束自动创建的索引）"""
+    for index in conn.exec_driver_sql(f"PRAGMA index_list({table})"):
+        name, unique = index[1], index[2]
+        if unique:
+            columns = [row[2] for row in conn.exec_driver_sql(f"PRAGMA index_info('{name}')")]
+            if columns == [column]:
+                return True
+    return False
+
+def _migrate_schema(conn):
+    """
+    补齐旧版数据库缺少的列和索引
+
+    create_all 只创建不存在的表，不会修改已有的表，旧数据库需在此逐项升级；
+    每一步都先检查当前结构，重复执行不会产生影响
+    """
+    # uploaded_files：上传去重用的内容哈希列及其唯一索引，file_path 查询索引
+    columns = _table_columns(conn, "uploaded_files")
+    if "content_hash" not in columns:
+        conn.exec_driver_sql("ALTER TABLE uploaded_files ADD COLUMN content_hash VARCHAR(64)")
+    if not _has_unique_index(conn, "uploaded_files", "content_hash"):
+        conn.exec_driver_sql(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ix_uploaded_files_content_hash ON uploaded_files (content_hash)"
+        )
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_uploaded_files_file_path ON uploaded_files (file_path)")
+
+    # transcriptions：结果列与创建时间列
+    columns = _table_columns(conn, "transcriptions")
+    if "results" not in columns:
+        conn.exec_driver_sql("ALTER TABLE transcriptions ADD COLUMN results BLOB")
+        if "transcription" in columns:
+            # 最早的表结构把JSON文本保存在 transcription 列中，读取时按未压缩的JSON解析
+            conn.exec_driver_sql("UPDATE transcriptions SET results = transcription")
+    if "created_at" not in columns:
+        conn.exec_driver_sql("ALTER TABLE transcriptions ADD COLUMN created_at DATETIME")
+
+    # 转录结果按 file_path 写入（ON CONFLICT(file_path)），需要该列上的唯一索引；
+    # 建立索引前同一文件只保留最新的一条记录
+    if not _has_unique_index(conn, "transcriptions", "file_path"):
+        conn.exec_driver_sql(
+            "DELETE FROM transcriptions WHERE file_path IS NOT NULL AND id NOT IN "
+            "(SELECT MAX(id) FROM transcriptions WHERE file_path IS NOT NULL GROUP BY file_path)"
+        )
+        conn.exec_driver_sql(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ix_transcriptions_file_path ON transcriptions (file_path)"
+        )
 
-# 创建会话工厂
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def init_db(bind=None):
+    """
+    创建缺失的数据表并升级旧版数据库结构，表结构由外部迁移管理时可设置 SKIP_DB_INIT=1 跳过
 
-def get_db():
-    """获取数据库会话"""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+    Args:
+        bind: 数据库引擎，默认使用本模块的 engine
+    """
+    if os.environ.get("SKIP_DB_INIT"):
+        return
+    bind = bind if bind is not None else engine
+    Base.metadata.create_all(bind=bind)
+    with bind.begin() as conn:
+        _migrate_schema(conn)
\ No newline at end of file
@@ -1,26 +1,37 @@
-from fastapi import FastAPI, File, UploadFile, Body, HTTPException, BackgroundTasks, Form
-from fastapi.responses import JSONResponse
-from typing import Annotated, List, Dict, Optional
+from fastapi import FastAPI, File, UploadFile, Body, HTTPException, Form
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
+from typing import Annotated, Any, List, Dict, Optional, Callable
 import subprocess
-import json
+import orjson
 import shutil
+import hashlib
+import mimetypes
 from vosk import SetLogLevel
 import os
 from fastapi.middleware.cors import CORSMiddleware
-from uuid import uuid4
+from secrets import token_urlsafe
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 import tempfile
+import io
 import asyncio
+import threading
 # 在main.py的开头配置全局日志
 import logging
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pydantic import BaseModel, Field
 import time
+import bisect
+import struct
+import numpy as np
+from sqlalchemy import insert, select, delete
+from sqlalchemy.exc import IntegrityError
 
 from .transcription_service import TranscriptionService
-from .models import Base, UploadedFile, Transcription
-from .database import engine, SessionLocal
+from .models import UploadedFile
+from .database import engine, init_db
 
 # 配置全局日志格式
 logging.basicConfig(
@@ -36,11 +47,43 @@ logger = logging.getLogger(__name__)
 
 SetLogLevel(-1)  # Suppress Vosk logging
 
+# 可选：Redis，用于保存跨进程共享的任务状态
+try:
+    from redis import Redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# 可选：Redis任务队列（RQ），用于将剪切任务交给独立的worker进程执行
+try:
+    from rq import Queue
+    from rq.job import Job
+    from rq.exceptions import NoSuchJobError
+    RQ_AVAILABLE = True
+except ImportError:
+    RQ_AVAILABLE = False
+
 # 配置
 MAX_PREVIEW_DURATION = 600  # 预览最大时长10分钟
 MIN_SEGMENT_DURATION = 0.1  # 最小片段时长
+MIN_RENDER_SEGMENT_DURATION = 0.3  # 保留多个片段时，短于此时长的片段不输出
+HW_ENCODER = os.environ.get("HW_ENCODER", "auto")  # 硬件编码器：auto自动检测，none禁用，或指定h264_nvenc/h264_qsv/h264_vaapi/h264_videotoolbox
+VAAPI_DEVICE = os.environ.get("VAAPI_DEVICE", "/dev/dri/renderD128")  # VAAPI渲染设备
+KEYFRAME_TOLERANCE = 0.04  # 剪切点与关键帧的最大偏差（约25fps下一帧），在此范围内直接复制码流
+FILTER_COMPLEX_ARG_LIMIT = 100_000  # 滤镜图超过此长度时写入文件，通过 -filter_complex_script 传给FFmpeg
+CUT_PART_WORKERS = int(os.environ.get("CUT_PART_WORKERS", 4))  # 单个剪切任务并行导出中间片段的FFmpeg进程数
 TEMP_FILE_CLEANUP_HOURS = 24  # 临时文件清理时间
-MAX_CONCURRENT_JOBS = 2  # 最大并发处理任务数
+TEMP_FILE_CLEANUP_INTERVAL = 300  # 临时文件定期清理间隔（秒）
+# 最大并发剪切任务数；每个FFmpeg进程的线程数按此值平分CPU核心（见 FFMPEG_THREADS）
+MAX_CONCURRENT_JOBS = int(os.environ.get("MAX_CONCURRENT_JOBS", 1))
+MAX_UPLOAD_SIZE = 500 * 1024 * 1024  # 上传文件大小上限500MB
+UPLOAD_CHUNK_SIZE = 1 << 20  # 上传文件分块写入大小1MB
+MAX_BATCH_FILES = 32  # 批量转录单次请求的文件数上限
+REDIS_URL = os.environ.get("REDIS_URL")  # 设置后任务状态保存在Redis；安装rq时剪切任务进入队列，由 `rq worker cuts` 进程处理
+CUT_JOB_TIMEOUT = 1800  # 剪切任务最长执行时间（秒）
+TASK_RESULT_TTL = 3600  # 已结束任务状态保留时间（秒）
+TASK_SWEEP_INTERVAL = 60  # 未配置Redis时清理过期任务状态的间隔（秒）
+STATIC_DELEGATED = os.environ.get("STATIC_DELEGATED") == "1"  # 媒体文件由前置服务器提供，不在应用内挂载
 
 # 创建必要的目录
 app_dir = os.path.dirname(os.path.abspath(__file__))
@@ -59,18 +102,79 @@ for dir_name, dir_path in directories.items():
     except Exception as e:
         logger.error(f"创建目录 {dir_path} 时出错: {e}")
 
-# 创建转录服务实例
-transcription_service = TranscriptionService(
-    model_path=os.path.join(backend_dir, "models"),
-    temp_dir=directories["temp"]
-)
+# 转录服务实例，首次使用时才加载模型，只处理剪切、上传的进程（如 rq worker）不占用模型内存；
+# 使用 gunicorn --preload 时由主进程在fork前加载一次Vosk模型（见 gunicorn.conf.py 的 when_ready），
+# worker 以写时复制方式共享，加载后不得再修改模型对象；SenseVoice模型使用CUDA，由各worker自行加载
+_transcription_service: Optional[TranscriptionService] = None
+_transcription_service_lock = threading.Lock()
+
+def get_transcription_service(load_sensevoice: bool = True) -> TranscriptionService:
+    """
+    获取转录服务实例，首次调用时创建并加载模型
+    
+    Args:
+        load_sensevoice: 创建实例时是否同时加载SenseVoice模型；为False时推迟到首次SenseVoice转录时加载
+        
+    Returns:
+        转录服务实例
+    """
+    global _transcription_service
+    if _transcription_service is None:
+        with _transcription_service_lock:
+            if _transcription_service is None:
+                _transcription_service = TranscriptionService(
+                    model_path=os.path.join(backend_dir, "models"),
+                    temp_dir=directories["temp"],
+                    load_sensevoice=load_sensevoice
+                )
+    return _transcription_service
+
+async def load_transcription_service() -> TranscriptionService:
+    """在请求处理中获取转录服务实例；首次加载模型在工作线程中进行，不阻塞事件循环"""
+    if _transcription_service is not None:
+        return _transcription_service
+    return await asyncio.to_thread(get_transcription_service)
+
+def transcription_slot(model: str) -> asyncio.Semaphore:
+    """返回转录使用的并发限制：SenseVoice独占GPU，Vosk按CPU核数限制"""
+    if model.lower() == "sensevoice":
+        return sensevoice_semaphore
+    return transcription_semaphore
 
-# 创建线程池执行器
-executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_JOBS)
+# 以下为每个worker进程独立的状态，在 startup_event 中创建：
+# 使用 gunicorn --preload 时本模块在主进程中导入，线程池等对象不能在fork之前创建
+# 进程内执行剪切任务的线程池
+executor: Optional[ThreadPoolExecutor] = None
+# 限制同时运行的剪辑FFmpeg进程数量
+clip_semaphore: Optional[asyncio.Semaphore] = None
+# 限制同时进行的转录数量，避免Vosk解码线程过度竞争CPU
+transcription_semaphore: Optional[asyncio.Semaphore] = None
+# SenseVoice在单个GPU上推理，同一时间只允许一个转录，避免显存争用
+sensevoice_semaphore: Optional[asyncio.Semaphore] = None
 
-# 全局任务状态跟踪
+# 全局任务状态跟踪（未配置Redis时使用）
 processing_tasks = {}
 
+# 任务状态保存在Redis哈希 task:{id} 中，可跨进程、跨主机查询，结束后按TTL自动过期
+redis_client = None
+# 剪切任务队列
+cut_queue = None
+if REDIS_URL and REDIS_AVAILABLE:
+    redis_client = Redis.from_url(REDIS_URL)
+    logger.info(f"任务状态保存在Redis: {REDIS_URL}")
+    if RQ_AVAILABLE:
+        cut_queue = Queue("cuts", connection=redis_client)
+        logger.info("剪切任务使用Redis队列")
+elif REDIS_URL:
+    logger.warning("已设置REDIS_URL但未安装redis，任务状态将保存在进程内")
+
+# Redis中进程内执行的剪切任务集合（有序集合，成员为任务ID，分值为截止时间），所有API进程共享并发上限；
+# 进程崩溃时未归还的名额在截止时间过后自动失效
+ACTIVE_CUTS_KEY = "active_cut_tasks"
+# 未配置Redis时，本进程内执行中的剪切任务计数
+active_cuts = 0
+active_cuts_lock = threading.Lock()
+
 # Pydantic 模型定义
 class TranscribeRequest(BaseModel):
     file_path: str = Field(..., description="音频文件路径")
@@ -84,9 +188,24 @@ class TranscribeRequest(BaseModel):
             }
         }
 
+class TranscribeBatchRequest(BaseModel):
+    file_paths: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_FILES, description="音频文件路径列表")
+    model: str = Field(default="vosk", description="转录模型 (vosk 或 sensevoice)")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "file_paths": ["uploads/a.wav", "uploads/b.wav"],
+                "model": "vosk"
+            }
+        }
+
 class CutRequest(BaseModel):
+    """视频剪切请求；同时最多处理MAX_CONCURRENT_JOBS个任务（默认1个），超出时返回429"""
     file_path: str = Field(..., description="视频文件路径")
     delete_segments: List[Dict[str, float]] = Field(..., description="需要删除的时间段")
+    precise: bool = Field(False, description="是否要求帧级精确的剪切点；默认只保留一个片段时直接复制码流，起点对齐到之前的关键帧")
+    preview: bool = Field(True, description="输出是否仅用于预览；需要重新编码时使用更快、画质较低的编码参数")
     
     class Config:
         json_schema_extra = {
@@ -106,7 +225,16 @@ class TaskStatus(BaseModel):
     updated_at: datetime
 
 # 创建主应用
-app = FastAPI(title="Video Processing API", version="1.0.0")
+class ORJSONResponse(JSONResponse):
+    """
+    使用orjson序列化的JSON响应，比标准库json快数倍，/cut/status 等高频轮询接口受益最多
+    
+    FastAPI自带的同名类在新版本中已弃用，这里直接继承 JSONResponse 实现
+    """
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+app = FastAPI(title="Video Processing API", version="1.0.0", default_response_class=ORJSONResponse)
 
 # CORS配置
 app.add_middleware(
@@ -117,9 +245,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 初始化数据库
-Base.metadata.create_all(bind=engine)
-
 def validate_segments(segments: List[Dict], duration: float) -> List[Dict]:
     """验证并清理时间段数据"""
     if not segments:
@@ -146,74 +271,637 @@ def validate_segments(segments: List[Dict], duration: float) -> List[Dict]:
     
     return validated_segments
 
+MP4_EXTENSIONS = {'.mp4', '.m4v', '.mov'}
+
+def read_mp4_duration(file_path: str) -> Optional[float]:
+    """
+    直接从MP4/MOV的moov/mvhd盒读取时长，无需启动ffprobe
+    
+    Args:
+        file_path: 视频文件路径
+        
+    Returns:
+        时长（秒），文件结构无法识别或mvhd中没有记录时长时返回None
+    """
+    try:
+        with open(file_path, "rb") as f:
+            file_size = os.fstat(f.fileno()).st_size
+            offset = 0
+            end = file_size
+            # 先在顶层查找moov，找到后进入其中查找mvhd
+            while offset + 8 <= end:
+                f.seek(offset)
+                header = f.read(16)
+                size, box_type = struct.unpack(">I4s", header[:8])
+                header_size = 8
+                if size == 1:
+                    size = struct.unpack(">Q", header[8:16])[0]
+                    header_size = 16
+                elif size == 0:
+                    size = end - offset
+                if size < header_size:
+                    return None
+                
+                if box_type == b"moov":
+                    offset += header_size
+                    end = offset - header_size + size
+                    continue
+                if box_type == b"mvhd":
+                    f.seek(offset + header_size)
+                    version = f.read(4)[0]
+                    if version == 1:
+                        timescale, duration = struct.unpack(">16xIQ", f.read(28))
+                        unknown = 0xFFFFFFFFFFFFFFFF
+                    else:
+                        timescale, duration = struct.unpack(">8xII", f.read(16))
+                        unknown = 0xFFFFFFFF
+                    # 分片MP4（如浏览器MediaRecorder录制的文件）的mvhd时长为0，需由ffprobe读取
+                    if timescale == 0 or duration in (0, unknown):
+                        return None
+                    return duration / timescale
+                offset += size
+    except (OSError, struct.error, IndexError):
+        return None
+    return None
+
+@lru_cache(maxsize=1024)
+def _probe_video_duration(file_path: str, mtime_ns: int, size: int) -> float:
+    """按 (路径, 修改时间, 大小) 缓存的时长探测，文件变化后键随之变化，缓存自动失效"""
+    if Path(file_path).suffix.lower() in MP4_EXTENSIONS:
+        duration = read_mp4_duration(file_path)
+        if duration is not None:
+            return duration
+    
+    command = [
+        "ffprobe",
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "format=duration:stream=duration",
+        "-of", "json",
+        file_path
+    ]
+    result = subprocess.run(command, capture_output=True, text=True, check=True, timeout=30)
+    info = orjson.loads(result.stdout)
+    # 部分容器没有整体时长，此时使用视频流时长
+    duration = info.get("format", {}).get("duration")
+    if duration is None:
+        duration = info["streams"][0]["duration"]
+    return float(duration)
+
 def get_video_duration(file_path: str) -> float:
     """获取视频文件的总时长（秒）"""
     try:
-        command = [
-            "ffprobe",
-            "-v", "error",
-            "-show_entries", "format=duration",
-            "-of", "csv=p=0",
-            file_path
-        ]
-        result = subprocess.run(command, capture_output=True, text=True, check=True, timeout=30)
-        duration = float(result.stdout.strip())
-        return duration
+        # 同一文件以相对路径和绝对路径访问时共用缓存
+        file_path = os.path.abspath(file_path)
+        st = os.stat(file_path)
+        return _probe_video_duration(file_path, st.st_mtime_ns, st.st_size)
     except subprocess.TimeoutExpired:
         raise Exception("获取视频时长超时")
     except subprocess.CalledProcessError as e:
         raise Exception(f"FFprobe执行失败: {e.stderr}")
-    except (ValueError, IndexError):
+    except (ValueError, IndexError, KeyError):
         raise Exception("无法解析视频时长")
     except Exception as e:
         raise Exception(f"获取视频时长失败: {str(e)}")
 
-def calculate_keep_segments(duration: float, delete_segments: List[Dict]) -> List[Dict]:
-    """计算需要保留的视频片段"""
-    if not delete_segments:
-        return [{"start": 0, "end": duration}]
+# 每个FFmpeg进程的编码/滤镜线程数：按并发任务数平分CPU核心，避免多个任务同时运行时线程过度竞争；
+# 可通过环境变量 FFMPEG_THREADS 覆盖
+FFMPEG_THREADS = int(os.environ.get("FFMPEG_THREADS", 0)) or max(1, (os.cpu_count() or 4) // MAX_CONCURRENT_JOBS)
+FFMPEG_THREAD_ARGS = [
+    "-filter_threads", str(FFMPEG_THREADS),
+    "-filter_complex_threads", str(FFMPEG_THREADS),
+]
+
+def run_ffmpeg(args: List[str], timeout: int, on_progress: Optional[Callable[[float], None]] = None):
+    """
+    执行FFmpeg命令，仅保留stderr用于失败时的错误信息
+    
+    Args:
+        args: FFmpeg参数（不含通用的全局参数）
+        timeout: 超时时间（秒）
+        on_progress: 可选的进度回调，参数为已输出的媒体时长（秒）；
+            提供时通过 -progress pipe:1 读取FFmpeg的实时进度
+    """
+    command = ["ffmpeg", "-y", "-nostdin", "-hide_banner", "-loglevel", "error", *FFMPEG_THREAD_ARGS]
+    if on_progress is not None:
+        run_ffmpeg_with_progress([*command, "-progress", "pipe:1", "-nostats", *args], timeout, on_progress)
+        return
+    
+    command.extend(args)
+    subprocess.run(
+        command,
+        check=True,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        timeout=timeout
+    )
+
+async def run_ffmpeg_async(args: List[str], timeout: int):
+    """
+    在事件循环中异步执行FFmpeg命令，等待期间不占用线程
+    
+    Args:
+        args: FFmpeg参数（不含通用的全局参数）
+        timeout: 超时时间（秒），超时后结束进程并抛出 subprocess.TimeoutExpired
+    """
+    command = ["ffmpeg", "-y", "-nostdin", "-hide_banner", "-loglevel", "error", *FFMPEG_THREAD_ARGS, *args]
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        # -loglevel error 下stderr只有错误信息，整体读取即可
+        _, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise subprocess.TimeoutExpired(command, timeout)
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(
+            process.returncode, command, stderr=stderr.decode(errors="replace")
+        )
+
+def run_ffmpeg_with_progress(command: List[str], timeout: int, on_progress: Callable[[float], None]):
+    """运行带 -progress pipe:1 的FFmpeg命令，逐行解析进度并回调"""
+    proc = subprocess.Popen(
+        command,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    # stderr在后台线程中读取，避免管道写满导致FFmpeg阻塞
+    stderr_lines = []
+    stderr_thread = threading.Thread(target=lambda: stderr_lines.extend(proc.stderr), daemon=True)
+    stderr_thread.start()
+    expired = threading.Event()
+    timer = threading.Timer(timeout, lambda: (expired.set(), proc.kill()))
+    timer.start()
+    
+    try:
+        for line in proc.stdout:
+            # out_time_ms 实际单位为微秒；尚无输出时为 N/A
+            key, _, value = line.partition("=")
+            value = value.strip()
+            if key == "out_time_ms" and value.isdigit():
+                on_progress(int(value) / 1_000_000)
+    except BaseException:
+        proc.kill()
+        raise
+    finally:
+        returncode = proc.wait()
+        timer.cancel()
+        stderr_thread.join()
+    
+    if expired.is_set():
+        raise subprocess.TimeoutExpired(command, timeout)
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command, stderr="".join(stderr_lines))
+
+# 各编码器对应的参数，质量大致对齐 libx264 -crf 23
+ENCODER_ARGS = {
+    "h264_nvenc": ["-c:v", "h264_nvenc", "-preset", "p4", "-rc", "vbr", "-cq", "23"],
+    "h264_vaapi": ["-c:v", "h264_vaapi", "-qp", "23"],
+    "h264_qsv": ["-c:v", "h264_qsv", "-preset", "veryfast", "-global_quality", "23"],
+    "h264_videotoolbox": ["-c:v", "h264_videotoolbox", "-b:v", "8M"],
+    "libx264": ["-c:v", "libx264", "-preset", "fast", "-crf", "23"],
+}
+# 预览输出的编码参数：软件编码时用最快的预设换取速度，较小的GOP便于预览时拖动定位；
+# 硬件编码本身已足够快，沿用 ENCODER_ARGS
+PREVIEW_ENCODER_ARGS = {
+    "libx264": ["-c:v", "libx264", "-preset", "ultrafast", "-crf", "28", "-tune", "zerolatency", "-g", "60"],
+}
+VAAPI_UPLOAD_FILTER = "format=nv12,hwupload"
+# 自动检测时依次尝试的硬件编码器
+HW_ENCODER_CANDIDATES = ("h264_nvenc", "h264_qsv", "h264_vaapi", "h264_videotoolbox")
+
+def hw_device_args(encoder: str, hw_decode: bool = True) -> List[str]:
+    """
+    返回编码器需要的硬件设备参数，放在输入之前
+    
+    Args:
+        encoder: 编码器名称
+        hw_decode: 是否同时使用硬件解码输入（仅对NVENC生效）
+    """
+    if encoder == "h264_vaapi":
+        return ["-vaapi_device", VAAPI_DEVICE]
+    if encoder == "h264_nvenc" and hw_decode:
+        # 输入也在GPU上解码；解码后的帧下载回内存，trim/concat等CPU滤镜仍可使用
+        return ["-hwaccel", "cuda"]
+    return []
+
+@lru_cache(maxsize=None)
+def detect_hw_encoder() -> str:
+    """
+    检测可用的H.264编码器，结果在进程内缓存
+    
+    仅出现在 `ffmpeg -encoders` 列表中并不代表驱动和设备可用，
+    因此对候选编码器做一次极短的试编码
+    
+    Returns:
+        可用的编码器名称，没有可用的硬件编码器时返回 libx264
+    """
+    if HW_ENCODER == "none":
+        return "libx264"
+    candidates = list(HW_ENCODER_CANDIDATES) if HW_ENCODER == "auto" else [HW_ENCODER]
+    
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            capture_output=True, text=True, check=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.warning(f"无法列出FFmpeg编码器: {e}")
+        return "libx264"
+    
+    for encoder in candidates:
+        if encoder not in ENCODER_ARGS or encoder not in result.stdout:
+            continue
+        video_filter = ["-vf", VAAPI_UPLOAD_FILTER] if encoder == "h264_vaapi" else []
+        try:
+            run_ffmpeg([
+                *hw_device_args(encoder, hw_decode=False),
+                "-f", "lavfi", "-i", "color=size=256x256:duration=0.1",
+                *video_filter,
+                *ENCODER_ARGS[encoder],
+                "-f", "null", "-"
+            ], timeout=30)
+        except (OSError, subprocess.SubprocessError):
+            logger.info(f"硬件编码器不可用: {encoder}")
+            continue
+        logger.info(f"使用硬件编码器: {encoder}")
+        return encoder
+    return "libx264"
+
+def build_encode_args(filter_complex: bool = False, preview: bool = False) -> List[str]:
+    """
+    构建视频编码参数
+    
+    Args:
+        filter_complex: 调用方是否使用 -filter_complex；此时VAAPI上传滤镜需由调用方
+            通过 VAAPI_UPLOAD_FILTER 接入滤镜图，不能再使用 -vf
+        preview: 输出是否仅用于预览；为True时使用 PREVIEW_ENCODER_ARGS 中更快的参数
+            
+    Returns:
+        视频编码相关的FFmpeg参数
+    """
+    encoder = detect_hw_encoder()
+    encoder_args = ENCODER_ARGS[encoder]
+    if preview:
+        encoder_args = PREVIEW_ENCODER_ARGS.get(encoder, encoder_args)
+    # 编码器线程数与 FFMPEG_THREADS 一致，不再按全部核心自动选择
+    if encoder == "h264_vaapi" and not filter_complex:
+        return ["-vf", VAAPI_UPLOAD_FILTER, *encoder_args, "-threads", str(FFMPEG_THREADS)]
+    return [*encoder_args, "-threads", str(FFMPEG_THREADS)]
+
+def get_keyframes(file_path: str) -> List[float]:
+    """
+    获取视频流中关键帧的时间戳（只读取包信息，不解码）
+    
+    Args:
+        file_path: 视频文件路径
+        
+    Returns:
+        升序排列的关键帧时间戳列表（秒）
+    """
+    command = [
+        "ffprobe",
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags",
+        "-of", "csv=p=0",
+        file_path
+    ]
+    result = subprocess.run(command, capture_output=True, text=True, check=True, timeout=120)
+    keyframes = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags and pts_time not in ("", "N/A"):
+            keyframes.append(float(pts_time))
+    keyframes.sort()
+    return keyframes
+
+def snap_to_keyframe(timestamp: float, keyframes: List[float]) -> Optional[float]:
+    """返回与timestamp相差不超过KEYFRAME_TOLERANCE的关键帧时间，不存在时返回None"""
+    i = bisect.bisect_right(keyframes, timestamp + KEYFRAME_TOLERANCE)
+    if i == 0:
+        return None
+    keyframe = keyframes[i - 1]
+    return keyframe if timestamp - keyframe <= KEYFRAME_TOLERANCE else None
+
+# ffprobe输出的H.264 profile到libx264 -profile:v 参数的映射
+H264_PROFILES = {
+    "Constrained Baseline": "baseline",
+    "Baseline": "baseline",
+    "Main": "main",
+    "High": "high",
+}
+
+def probe_av_streams(file_path: str) -> Dict:
+    """
+    获取首个视频流和音频流的编码参数
+    
+    Args:
+        file_path: 视频文件路径
+        
+    Returns:
+        {"video": {...} 或 None, "audio": {...} 或 None}
+    """
+    command = [
+        "ffprobe",
+        "-v", "error",
+        "-show_entries", "stream=codec_type,codec_name,profile,pix_fmt,sample_rate,channels",
+        "-of", "json",
+        file_path
+    ]
+    result = subprocess.run(command, capture_output=True, text=True, check=True, timeout=30)
+    streams = {"video": None, "audio": None}
+    for stream in orjson.loads(result.stdout).get("streams", []):
+        codec_type = stream.get("codec_type")
+        if codec_type in streams and streams[codec_type] is None:
+            streams[codec_type] = stream
+    return streams
+
+def plan_smart_cut(segments: List[Dict], keyframes: List[float], precise: bool = True) -> List[Dict]:
+    """
+    将保留片段拆分为重新编码的片头和直接复制码流的主体
+    
+    起点不在关键帧上的片段，从起点到下一个关键帧的部分重新编码，其余部分直接复制。
+    复制码流时只有起点必须是关键帧，终点可以落在任意位置，因此片尾无需重新编码。
+    
+    Args:
+        segments: 保留片段列表
+        keyframes: 升序排列的关键帧时间戳
+        precise: 为False时起点直接前移到之前最近的关键帧，整段复制码流，不再重新编码片头
+        
+    Returns:
+        按顺序排列的片段列表，每项包含 start、end 和 copy（是否直接复制码流）
+    """
+    pieces = []
+    for seg in segments:
+        start, end = seg["start"], seg["end"]
+        copy_start = snap_to_keyframe(start, keyframes)
+        if copy_start is None and not precise:
+            i = bisect.bisect_right(keyframes, start) - 1
+            if i >= 0:
+                copy_start = keyframes[i]
+        if copy_start is None:
+            i = bisect.bisect_right(keyframes, start)
+            copy_start = keyframes[i] if i < len(keyframes) else end
+            pieces.append({"start": start, "end": min(copy_start, end), "copy": False})
+        if end - copy_start > KEYFRAME_TOLERANCE:
+            pieces.append({"start": copy_start, "end": end, "copy": True})
+    return pieces
+
+def pieces_to_segments(pieces: List[Dict]) -> List[Dict]:
+    """
+    将 plan_smart_cut 的结果还原为输出视频实际包含的源视频时间段
     
-    # 合并重叠的删除片段
-    delete_segments = sorted(delete_segments, key=lambda x: x["start"])
-    merged_deletes = []
-    current_start, current_end = delete_segments[0]["start"], delete_segments[0]["end"]
+    不要求精确时片段起点已前移到关键帧，返回的起点与请求的保留片段不同。
     
-    for segment in delete_segments[1:]:
-        if segment["start"] <= current_end:  # 重叠或相邻
-            current_end = max(current_end, segment["end"])
+    Args:
+        pieces: plan_smart_cut 返回的片段列表
+        
+    Returns:
+        按顺序排列的时间段列表，重新编码的片头与其后复制的主体合并为一段
+    """
+    segments = []
+    prev = None
+    for piece in pieces:
+        if prev is not None and not prev["copy"] and piece["copy"] and piece["start"] == prev["end"]:
+            segments[-1]["end"] = piece["end"]
         else:
-            merged_deletes.append({"start": current_start, "end": current_end})
-            current_start, current_end = segment["start"], segment["end"]
+            segments.append({"start": piece["start"], "end": piece["end"]})
+        prev = piece
+    return segments
+
+def can_smart_cut(streams: Dict) -> bool:
+    """源视频为H.264（音频为AAC或无音频）时，重新编码的片头才能与复制的部分拼接"""
+    video, audio = streams["video"], streams["audio"]
+    if video is None or video.get("codec_name") != "h264" or not video.get("pix_fmt"):
+        return False
+    if video.get("profile") not in H264_PROFILES:
+        return False
+    return audio is None or audio.get("codec_name") == "aac"
+
+def smart_cut(file_path: str, pieces: List[Dict], streams: Dict, output_path: str):
+    """
+    按 plan_smart_cut 的结果剪切：主体直接复制码流，片头用与源视频相同的参数重新编码，
+    各部分写为MPEG-TS中间文件后用concat demuxer无损拼接
     
-    merged_deletes.append({"start": current_start, "end": current_end})
+    Args:
+        file_path: 输入视频路径
+        pieces: plan_smart_cut 返回的片段列表
+        streams: probe_av_streams 返回的源视频流参数
+        output_path: 输出文件路径
+    """
+    def piece_args(piece: Dict, target: str, output_format: List[str]) -> List[str]:
+        args = [
+            "-ss", str(piece["start"]),
+            "-i", file_path,
+            "-t", str(piece["end"] - piece["start"]),
+            "-map", "0:v:0",
+            "-map", "0:a:0?",
+        ]
+        if piece["copy"]:
+            args += ["-c", "copy"]
+        else:
+            # 片头与复制部分拼接在同一条流中，编码参数必须与源视频一致
+            video, audio = streams["video"], streams["audio"]
+            args += ["-c:v", "libx264", "-preset", "fast", "-crf", "23", "-pix_fmt", video["pix_fmt"],
+                     "-threads", str(FFMPEG_THREADS)]
+            profile = H264_PROFILES.get(video.get("profile", ""))
+            if profile:
+                args += ["-profile:v", profile]
+            if audio is not None:
+                args += ["-c:a", "aac", "-ar", str(audio["sample_rate"]), "-ac", str(audio["channels"])]
+        return [*args, "-avoid_negative_ts", "make_zero", *output_format, target]
     
-    # 计算保留片段
-    keep_segments = []
-    current_time = 0
+    if len(pieces) == 1 and pieces[0]["copy"]:
+        run_ffmpeg(piece_args(pieces[0], output_path, ["-movflags", "+faststart"]), timeout=1800)
+        return
     
-    for segment in merged_deletes:
-        if current_time < segment["start"]:
-            keep_segments.append({"start": current_time, "end": segment["start"]})
-        current_time = max(current_time, segment["end"])
+    part_dir = tempfile.mkdtemp(prefix="cut_", dir=directories["temp"])
+    try:
+        # MPEG-TS时间基固定为90kHz，复制与重新编码的部分可以直接拼接
+        part_paths = [os.path.join(part_dir, f"part_{i}.ts") for i in range(len(pieces))]
+        # 各中间片段互不依赖，并行导出；复制码流的片段主要受磁盘IO限制
+        with ThreadPoolExecutor(max_workers=max(1, min(CUT_PART_WORKERS, len(pieces)))) as pool:
+            futures = [
+                pool.submit(run_ffmpeg, piece_args(piece, part_path, ["-f", "mpegts"]), 1800)
+                for piece, part_path in zip(pieces, part_paths)
+            ]
+            for future in as_completed(futures):
+                future.result()
+        list_lines = [f"file '{part_path}'" for part_path in part_paths]
+        
+        list_path = os.path.join(part_dir, "list.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(list_lines))
+        
+        run_ffmpeg([
+            "-f", "concat",
+            "-safe", "0",
+            "-i", list_path,
+            "-c", "copy",
+            "-movflags", "+faststart",
+            output_path
+        ], timeout=1800)
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+
+def calculate_keep_segments(
+    duration: float,
+    delete_segments: List[Dict],
+    min_duration: float = MIN_SEGMENT_DURATION
+) -> List[Dict]:
+    """
+    计算需要保留的视频片段
+    
+    Args:
+        duration: 视频时长
+        delete_segments: 需要删除的时间段
+        min_duration: 保留片段的最短时长，不超过此时长的片段被丢弃
+        
+    Returns:
+        按时间顺序排列的保留片段列表
+    """
+    if not delete_segments:
+        return [{"start": 0, "end": duration}]
     
-    if current_time < duration:
-        keep_segments.append({"start": current_time, "end": duration})
+    # 按起点排序的 (N, 2) 删除区间数组
+    deletes = np.array([[seg["start"], seg["end"]] for seg in delete_segments], dtype=np.float64)
+    deletes = deletes[np.argsort(deletes[:, 0], kind="stable")]
     
-    # 过滤掉过短的片段
-    keep_segments = [seg for seg in keep_segments if seg["end"] - seg["start"] > MIN_SEGMENT_DURATION]
+    # 合并重叠或相邻的删除片段：起点大于之前所有终点的最大值时开始新的区间
+    running_end = np.maximum.accumulate(deletes[:, 1])
+    gaps = deletes[1:, 0] > running_end[:-1]
+    merged_starts = np.concatenate(([deletes[0, 0]], deletes[1:, 0][gaps]))
+    merged_ends = np.concatenate((running_end[:-1][gaps], [running_end[-1]]))
     
-    return keep_segments
+    # 保留片段为删除区间在 [0, duration] 上的补集
+    keep_starts = np.concatenate(([0.0], merged_ends))
+    keep_ends = np.concatenate((merged_starts, [duration]))
+    
+    # 过滤掉过短的片段（同时去掉空区间）
+    mask = keep_ends - keep_starts > min_duration
+    return [
+        {"start": start, "end": end}
+        for start, end in zip(keep_starts[mask].tolist(), keep_ends[mask].tolist())
+    ]
 
 def update_task_status(task_id: str, status: str, progress: int = 0, result: Dict = None, error_message: str = None):
     """更新任务状态"""
-    if task_id in processing_tasks:
-        processing_tasks[task_id].update({
-            "status": status,
-            "progress": progress,
-            "result": result,
-            "error_message": error_message,
-            "updated_at": datetime.utcnow()
-        })
+    fields = {
+        "status": status,
+        "progress": progress,
+        "result": result,
+        "error_message": error_message,
+        "updated_at": time.time()
+    }
+    if redis_client is not None:
+        key = f"task:{task_id}"
+        pipe = redis_client.pipeline()
+        pipe.hset(key, mapping={name: orjson.dumps(value) for name, value in fields.items()})
+        if status in ("completed", "failed"):
+            pipe.expire(key, TASK_RESULT_TTL)
+        pipe.execute()
+    elif task_id in processing_tasks:
+        processing_tasks[task_id].update(fields)
+
+def create_task(task_id: str) -> Dict:
+    """创建处于processing状态的任务记录"""
+    now = time.time()
+    task = {
+        "task_id": task_id,
+        "status": "processing",
+        "progress": 0,
+        "result": None,
+        "error_message": None,
+        "created_at": now,
+        "updated_at": now
+    }
+    if redis_client is not None:
+        key = f"task:{task_id}"
+        pipe = redis_client.pipeline()
+        pipe.hset(key, mapping={name: orjson.dumps(value) for name, value in task.items()})
+        # 处理中的任务也设置过期时间，防止进程崩溃后状态永久残留
+        pipe.expire(key, CUT_JOB_TIMEOUT + TASK_RESULT_TTL)
+        pipe.execute()
+    else:
+        processing_tasks[task_id] = task
+    return task
+
+def format_task(task: Dict) -> Dict:
+    """
+    生成接口返回的任务状态；内部以 time.time() 浮点时间戳记录时间，返回时转换为UTC时间的ISO格式字符串
+    
+    Args:
+        task: 任务记录
+        
+    Returns:
+        时间字段为ISO格式字符串的任务记录副本
+    """
+    return {
+        **task,
+        "created_at": datetime.fromtimestamp(task["created_at"], timezone.utc).replace(tzinfo=None).isoformat(),
+        "updated_at": datetime.fromtimestamp(task["updated_at"], timezone.utc).replace(tzinfo=None).isoformat()
+    }
+
+def get_task(task_id: str) -> Optional[Dict]:
+    """从Redis读取任务记录，不存在或已过期时返回None"""
+    data = redis_client.hgetall(f"task:{task_id}")
+    if not data:
+        return None
+    return {name.decode(): orjson.loads(value) for name, value in data.items()}
+
+def acquire_cut_slot(task_id: str) -> bool:
+    """
+    为任务占用一个剪切任务并发名额，已达上限时返回False
+    
+    Args:
+        task_id: 任务ID
+        
+    Returns:
+        是否成功占用名额
+    """
+    global active_cuts
+    if redis_client is not None:
+        now = time.time()
+        # 先清理已超过截止时间的名额，再原子地占用名额，超出上限时归还
+        pipe = redis_client.pipeline()
+        pipe.zremrangebyscore(ACTIVE_CUTS_KEY, "-inf", now)
+        pipe.zadd(ACTIVE_CUTS_KEY, {task_id: now + CUT_JOB_TIMEOUT})
+        pipe.zcard(ACTIVE_CUTS_KEY)
+        if pipe.execute()[-1] > MAX_CONCURRENT_JOBS:
+            redis_client.zrem(ACTIVE_CUTS_KEY, task_id)
+            return False
+        return True
+    with active_cuts_lock:
+        if active_cuts >= MAX_CONCURRENT_JOBS:
+            return False
+        active_cuts += 1
+        return True
+
+def release_cut_slot(task_id: str):
+    """归还任务占用的剪切任务并发名额"""
+    global active_cuts
+    if redis_client is not None:
+        redis_client.zrem(ACTIVE_CUTS_KEY, task_id)
+        return
+    with active_cuts_lock:
+        active_cuts -= 1
+
+def run_cut_task(task_id: str, file_path: str, delete_segments: List[Dict], precise: bool = False, preview: bool = True):
+    """在当前进程中执行剪切任务，结束后归还并发名额"""
+    try:
+        process_video_cutting(task_id, file_path, delete_segments, precise, preview)
+    finally:
+        release_cut_slot(task_id)
 
 def cleanup_temp_files():
     """清理过期的临时文件"""
@@ -222,18 +910,80 @@ def cleanup_temp_files():
         current_time = time.time()
         cleanup_threshold = TEMP_FILE_CLEANUP_HOURS * 3600
         
-        for filename in os.listdir(temp_dir):
-            file_path = os.path.join(temp_dir, filename)
-            if os.path.isfile(file_path):
-                file_age = current_time - os.path.getmtime(file_path)
-                if file_age > cleanup_threshold:
-                    os.remove(file_path)
-                    logger.info(f"清理过期临时文件: {filename}")
+        # 通过目录文件描述符扫描和删除，stat/unlink 都相对该目录进行，不再逐个解析完整路径
+        dir_fd = os.open(temp_dir, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            expired_files = []
+            expired_dirs = []
+            # scandir 的 DirEntry 自带文件类型，stat 结果也会缓存，每个条目只需一次stat
+            with os.scandir(dir_fd) as entries:
+                for entry in entries:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if not is_dir and not entry.is_file(follow_symlinks=False):
+                        continue
+                    if current_time - entry.stat(follow_symlinks=False).st_mtime <= cleanup_threshold:
+                        continue
+                    (expired_dirs if is_dir else expired_files).append(entry.name)
+            
+            # 扫描结束后集中删除
+            for name in expired_files:
+                try:
+                    os.unlink(name, dir_fd=dir_fd)
+                except FileNotFoundError:
+                    continue
+                logger.info(f"清理过期临时文件: {name}")
+            for name in expired_dirs:
+                # 剪切任务的中间文件目录，进程异常退出时可能残留
+                shutil.rmtree(os.path.join(temp_dir, name), ignore_errors=True)
+                logger.info(f"清理过期临时文件: {name}")
+        finally:
+            os.close(dir_fd)
     except Exception as e:
         logger.warning(f"清理临时文件时出错: {e}")
 
-def process_video_cutting(task_id: str, file_path: str, delete_segments: List[Dict]):
-    """异步处理视频剪切"""
+def sweep_expired_tasks():
+    """删除结束超过 TASK_RESULT_TTL 的任务状态（仅用于未配置Redis时的进程内字典）"""
+    now = time.time()
+    # 先复制条目列表，剪切线程可能同时在字典中创建任务
+    expired = [
+        task_id for task_id, task in list(processing_tasks.items())
+        if task["status"] in ("completed", "failed")
+        and now - task["updated_at"] > TASK_RESULT_TTL
+    ]
+    for task_id in expired:
+        processing_tasks.pop(task_id, None)
+    if expired:
+        logger.info(f"清理过期任务状态 {len(expired)} 个")
+
+async def periodic_task_sweep():
+    """后台定期清理过期任务状态，未被查询的任务也不会一直留在内存中"""
+    while True:
+        await asyncio.sleep(TASK_SWEEP_INTERVAL)
+        sweep_expired_tasks()
+
+async def periodic_temp_cleanup():
+    """后台定期清理过期临时文件"""
+    while True:
+        await asyncio.sleep(TEMP_FILE_CLEANUP_INTERVAL)
+        await asyncio.to_thread(cleanup_temp_files)
+
+def process_video_cutting(
+    task_id: str,
+    file_path: str,
+    delete_segments: List[Dict],
+    precise: bool = False,
+    preview: bool = True
+):
+    """
+    异步处理视频剪切
+    
+    Args:
+        task_id: 任务ID
+        file_path: 视频文件路径
+        delete_segments: 需要删除的时间段
+        precise: 是否要求帧级精确；为False且只保留一个片段时，起点对齐到之前的关键帧后直接复制码流
+        preview: 输出是否仅用于预览；为True时重新编码使用更快的编码参数
+    """
     try:
         update_task_status(task_id, "processing", 10)
         
@@ -265,6 +1015,14 @@ def process_video_cutting(task_id: str, file_path: str, delete_segments: List[Di
         if not keep_segments:
             raise ValueError("删除操作后没有剩余内容")
         
+        # 多个片段时过短的片段不参与输出，恰好等于最短时长的片段仍然保留
+        render_segments = keep_segments
+        if len(keep_segments) > 1:
+            render_segments = [
+                seg for seg in keep_segments
+                if seg["end"] - seg["start"] >= MIN_RENDER_SEGMENT_DURATION
+            ]
+        
         update_task_status(task_id, "processing", 30)
         
         # 检查预览时长限制
@@ -280,86 +1038,143 @@ def process_video_cutting(task_id: str, file_path: str, delete_segments: List[Di
         
         update_task_status(task_id, "processing", 40)
         
+        def progress_reporter(expected_duration: float) -> Callable[[float], None]:
+            """按FFmpeg已输出的时长将编码进度映射到50%-90%，进度变化时才更新状态"""
+            last_progress = 50
+            def report(out_time: float):
+                nonlocal last_progress
+                fraction = min(out_time / expected_duration, 1.0) if expected_duration > 0 else 0.0
+                progress = 50 + int(40 * fraction)
+                if progress > last_progress:
+                    last_progress = progress
+                    update_task_status(task_id, "processing", progress)
+            return report
+        
+        # 尽量直接复制码流：只有起点到下一个关键帧之间的片头需要重新编码
+        stream_copied = False
+        try:
+            keyframes = get_keyframes(file_path)
+        except (subprocess.SubprocessError, ValueError) as e:
+            logger.warning(f"获取关键帧失败，将重新编码: {e}")
+            keyframes = []
+        
+        # 只保留一个片段且不要求精确时，起点前移到关键帧后整段复制，完全不经过编码器；
+        # 多个片段时前移会把前一个删除区间重新带回输出，因此片头始终重新编码，保证删除的内容被真正去掉
+        snap_start = not precise and len(render_segments) == 1
+        pieces = plan_smart_cut(render_segments, keyframes, precise=not snap_start) if keyframes else []
+        if any(piece["copy"] for piece in pieces):
+            try:
+                streams = None
+                if not all(piece["copy"] for piece in pieces):
+                    streams = probe_av_streams(file_path)
+                if streams is None or can_smart_cut(streams):
+                    smart_cut(file_path, pieces, streams, output_path)
+                    stream_copied = True
+            except (subprocess.SubprocessError, ValueError) as e:
+                logger.warning(f"码流复制失败，将重新编码: {getattr(e, 'stderr', None) or e}")
+        
         # 执行视频处理
-        if len(keep_segments) == 1:
+        if stream_copied:
+            copied = sum(piece["end"] - piece["start"] for piece in pieces if piece["copy"])
+            logger.info(f"已按关键帧剪切，直接复制码流 {copied:.1f}s: {task_id}")
+        elif len(keep_segments) == 1:
             # 单个片段，直接剪切
             segment = keep_segments[0]
             command = [
-                "ffmpeg", "-y",
-                "-i", file_path,
+                *hw_device_args(detect_hw_encoder()),
                 "-ss", str(segment["start"]),
-                "-to", str(segment["end"]),
-                "-c:v", "libx264",
+                "-i", file_path,
+                "-t", str(segment["end"] - segment["start"]),
+                *build_encode_args(preview=preview),
                 "-c:a", "aac",
-                "-preset", "fast",
-                "-crf", "23",
                 "-movflags", "+faststart",
                 "-avoid_negative_ts", "make_zero",
                 output_path
             ]
             
-            update_task_status(task_id, "processing", 60)
-            result = subprocess.run(command, capture_output=True, text=True, timeout=1800)
-            if result.returncode != 0:
-                raise subprocess.CalledProcessError(result.returncode, command, result.stderr)
+            try:
+                run_ffmpeg(command, timeout=1800, on_progress=progress_reporter(segment["end"] - segment["start"]))
+            except subprocess.CalledProcessError as e:
+                error_msg = e.stderr if e.stderr else str(e)
+                raise Exception(f"FFmpeg处理失败: {error_msg}")
                 
         else:
             # 多个片段，使用 filter_complex
             update_task_status(task_id, "processing", 50)
             
-            # 构建复杂过滤器
-            filter_parts = []
-            stream_maps = []
-            valid_segments = []
-            
-            # 首先过滤掉过短的片段
-            for segment in keep_segments:
-                duration = segment["end"] - segment["start"]
-                if duration >= 0.3:  # 跳过过短片段
-                    valid_segments.append(segment)
-            
+            valid_segments = render_segments
             if not valid_segments:
                 raise Exception("没有有效的视频片段可以处理")
             
-            # 为每个有效片段创建过滤器
+            n_segments = len(valid_segments)
+            # 一次遍历同时写出各片段的 trim/atrim 和两路 concat 的输入标签
+            trims = io.StringIO()
+            split_outputs = io.StringIO()
+            asplit_outputs = io.StringIO()
+            video_inputs = io.StringIO()
+            audio_inputs = io.StringIO()
             for i, segment in enumerate(valid_segments):
-                filter_parts.append(
-                    f"[0:v]trim=start={segment['start']}:end={segment['end']},setpts=PTS-STARTPTS[v{i}];"
-                    f"[0:a]atrim=start={segment['start']}:end={segment['end']},asetpts=PTS-STARTPTS[a{i}]"
+                trims.write(
+                    f"[vin{i}]trim=start={segment['start']}:end={segment['end']},setpts=PTS-STARTPTS[v{i}];"
+                    f"[ain{i}]atrim=start={segment['start']}:end={segment['end']},asetpts=PTS-STARTPTS[a{i}];"
                 )
-                stream_maps.extend([f"[v{i}]", f"[a{i}]"])
+                split_outputs.write(f"[vin{i}]")
+                asplit_outputs.write(f"[ain{i}]")
+                video_inputs.write(f"[v{i}]")
+                audio_inputs.write(f"[a{i}]")
             
-            n_segments = len(valid_segments)
-            # 构建视频流连接
-            video_concat = "".join(f"[v{i}]" for i in range(n_segments)) + f"concat=n={n_segments}:v=1:a=0[v_out];"
-            # 构建音频流连接
-            audio_concat = "".join(f"[a{i}]" for i in range(n_segments)) + f"concat=n={n_segments}:v=0:a=1[a_out]"
+            # 输入只解码一次，通过 split/asplit 显式分发给各片段的 trim/atrim
+            filter_complex = (
+                f"[0:v]split={n_segments}{split_outputs.getvalue()};"
+                f"[0:a]asplit={n_segments}{asplit_outputs.getvalue()};"
+                f"{trims.getvalue()}"
+                f"{video_inputs.getvalue()}concat=n={n_segments}:v=1:a=0[v_out];"
+                f"{audio_inputs.getvalue()}concat=n={n_segments}:v=0:a=1[a_out]"
+            )
             
-            # 合并所有filter命令
-            filter_complex = ";".join(filter_parts) + ";" + video_concat + audio_concat
+            # VAAPI编码需要先把拼接结果上传到显存
+            encoder = detect_hw_encoder()
+            video_out = "[v_out]"
+            if encoder == "h264_vaapi":
+                filter_complex += f";[v_out]{VAAPI_UPLOAD_FILTER}[v_hw]"
+                video_out = "[v_hw]"
             
-            logger.info(f"使用filter_complex命令: {filter_complex}")
+            filter_script_path = None
+            if len(filter_complex) > FILTER_COMPLEX_ARG_LIMIT:
+                # 片段很多时滤镜图可能超出命令行长度限制，改为从文件读取
+                filter_script_path = os.path.join(directories["temp"], f"filter_{task_id}.txt")
+                with open(filter_script_path, "w", encoding="utf-8") as f:
+                    f.write(filter_complex)
+                filter_args = ["-filter_complex_script", filter_script_path]
+                logger.info(f"滤镜图共 {len(filter_complex)} 字符，使用脚本文件: {filter_script_path}")
+            else:
+                filter_args = ["-filter_complex", filter_complex]
+                logger.info(f"使用filter_complex命令: {filter_complex}")
             
             command = [
-                "ffmpeg", "-y",
+                *hw_device_args(encoder),
                 "-i", file_path,
-                "-filter_complex", filter_complex,
-                "-map", "[v_out]",
+                *filter_args,
+                "-map", video_out,
                 "-map", "[a_out]",
-                "-c:v", "libx264",
+                *build_encode_args(filter_complex=True, preview=preview),
                 "-c:a", "aac",
-                "-preset", "fast",
-                "-crf", "23",
                 "-movflags", "+faststart",
                 output_path
             ]
             
-            update_task_status(task_id, "processing", 70)
             try:
-                result = subprocess.run(command, capture_output=True, text=True, check=True, timeout=1800)
+                run_ffmpeg(
+                    command,
+                    timeout=1800,
+                    on_progress=progress_reporter(sum(seg["end"] - seg["start"] for seg in valid_segments))
+                )
             except subprocess.CalledProcessError as e:
                 error_msg = e.stderr if e.stderr else str(e)
                 raise Exception(f"FFmpeg处理失败: {error_msg}")
+            finally:
+                if filter_script_path is not None:
+                    remove_if_exists(filter_script_path)
         
         update_task_status(task_id, "processing", 90)
         
@@ -367,14 +1182,18 @@ def process_video_cutting(task_id: str, file_path: str, delete_segments: List[Di
         if not os.path.exists(output_path):
             raise Exception("输出文件生成失败")
         
-        final_duration = get_video_duration(output_path)
+        if len(keep_segments) == 1 and not stream_copied:
+            # 单个片段重新编码时输出时长即为片段时长，无需再次探测
+            final_duration = keep_segments[0]["end"] - keep_segments[0]["start"]
+        else:
+            final_duration = get_video_duration(output_path)
         
         result = {
             "success": True,
             "preview_path": output_path,
             "preview_url": f"processed_videos/{output_filename}",  # 不带前导斜杠，与其他接口保持一致
             "deleted_segments": validated_segments,
-            "kept_segments": keep_segments,
+            "kept_segments": pieces_to_segments(pieces) if stream_copied else keep_segments,
             "original_duration": duration,
             "new_duration": final_duration,
             "compression_ratio": final_duration / duration if duration > 0 else 0
@@ -388,6 +1207,94 @@ def process_video_cutting(task_id: str, file_path: str, delete_segments: List[Di
         logger.error(f"视频处理失败 {task_id}: {error_msg}")
         update_task_status(task_id, "failed", error_message=error_msg)
 
+def remove_if_exists(path: str):
+    """删除文件，文件不存在时忽略"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def is_nonempty_file(path: str) -> bool:
+    """判断路径是否为非空文件"""
+    try:
+        return os.path.getsize(path) > 0
+    except OSError:
+        return False
+
+def copy_spooled_upload(src, target_path: str, size: int):
+    """
+    将已落盘的上传临时文件复制到目标路径，优先使用 copy_file_range 在内核中复制
+    
+    Args:
+        src: UploadFile.file（SpooledTemporaryFile）
+        target_path: 保存路径
+        size: 文件大小（字节）
+    """
+    src_fd = src.fileno()
+    with open(target_path, "wb") as out:
+        try:
+            offset = 0
+            while offset < size:
+                copied = os.copy_file_range(src_fd, out.fileno(), size - offset, offset_src=offset)
+                if copied == 0:
+                    break
+                offset += copied
+            return
+        except (AttributeError, OSError):
+            # 平台或文件系统不支持时回退到用户空间分块复制
+            out.seek(0)
+            out.truncate()
+        src.seek(0)
+        shutil.copyfileobj(src, out, UPLOAD_CHUNK_SIZE)
+
+async def save_upload(file: UploadFile, target_path: str, max_size: int = MAX_UPLOAD_SIZE, hasher=None) -> int:
+    """
+    分块将上传文件写入磁盘，边写边检查文件大小，避免整个文件驻留内存
+    
+    Args:
+        file: 上传的文件
+        target_path: 保存路径
+        max_size: 文件大小上限（字节）
+        hasher: 可选的hashlib对象，写入的同时计算内容摘要
+        
+    Returns:
+        写入的字节数
+        
+    Raises:
+        HTTPException: 文件超过大小上限时返回413，已写入的部分会被删除
+    """
+    # multipart解析时已知文件大小，超限的文件无需写入即可拒绝
+    if file.size is not None and file.size > max_size:
+        raise HTTPException(status_code=413, detail="File too large")
+    
+    # 请求体已由multipart解析器写入临时文件且无需计算摘要时，直接在内核中复制
+    if hasher is None and file.size is not None and file.size > UPLOAD_CHUNK_SIZE:
+        await asyncio.to_thread(copy_spooled_upload, file.file, target_path, file.size)
+        return file.size
+    
+    size = 0
+    # 磁盘写入和摘要计算在工作线程中进行，不阻塞事件循环
+    f = await asyncio.to_thread(open, target_path, "wb")
+    
+    def write_chunk(chunk: bytes):
+        f.write(chunk)
+        if hasher is not None:
+            hasher.update(chunk)
+    
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_size:
+                break
+            await asyncio.to_thread(write_chunk, chunk)
+    finally:
+        await asyncio.to_thread(f.close)
+    
+    if size > max_size:
+        await asyncio.to_thread(os.remove, target_path)
+        raise HTTPException(status_code=413, detail="File too large")
+    return size
+
 @app.get("/")
 async def root():
     return {"message": "Video Processing API v1.0", "status": "running"}
@@ -397,12 +1304,6 @@ async def upload_file(file: Annotated[UploadFile, File()]):
     if file.filename is None:
         raise HTTPException(status_code=400, detail="File name is missing.")
 
-    # 检查文件大小
-    MAX_FILE_SIZE = 500 * 1024 * 1024  # 500MB
-    content = await file.read()
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=413, detail="File too large")
-
     # 验证文件扩展名
     file_extension = Path(file.filename).suffix.lower()
     allowed_extensions = {'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm', '.m4v'}
@@ -410,31 +1311,59 @@ async def upload_file(file: Annotated[UploadFile, File()]):
         raise HTTPException(status_code=400, detail="Unsupported file format")
 
     # 生成唯一文件名并保存文件
-    unique_filename = f"{uuid4()}{file_extension}"
+    unique_filename = f"{token_urlsafe(16)}{file_extension}"
     absolute_path = os.path.join(directories["uploads"], unique_filename)  # 绝对路径，用于文件系统操作
 
-    with open(absolute_path, "wb") as f:
-        f.write(content)
+    # 写入的同时计算SHA-256，用于识别重复上传的相同内容
+    hasher = hashlib.sha256()
+    size = await save_upload(file, absolute_path, hasher=hasher)
+    content_hash = hasher.hexdigest()
+
+    # 命令行等客户端上传时可能不带content_type，按文件名推断
+    content_type = file.content_type or mimetypes.guess_type(file.filename)[0] or ""
+    file_type = "video" if content_type.startswith("video/") else "unknown"
+
+    def save_record() -> Optional[str]:
+        """写入文件记录；相同内容的文件已存在时不写入，返回已有文件的unique_filename"""
+        # 使用Core语句直接执行，不经过ORM Session
+        for _ in range(2):
+            try:
+                with engine.begin() as conn:
+                    existing = conn.execute(
+                        select(UploadedFile.id, UploadedFile.unique_filename, UploadedFile.file_path)
+                        .where(UploadedFile.content_hash == content_hash)
+                    ).first()
+                    if existing is not None:
+                        if os.path.exists(existing.file_path):
+                            return existing.unique_filename
+                        # 已有记录的文件已被删除，以本次上传替换该记录
+                        conn.execute(delete(UploadedFile).where(UploadedFile.id == existing.id))
+                    conn.execute(
+                        insert(UploadedFile).values(
+                            unique_filename=unique_filename,
+                            original_filename=file.filename,
+                            file_path=absolute_path,  # 存储绝对路径
+                            file_type=file_type,
+                            content_hash=content_hash
+                        )
+                    )
+                return None
+            except IntegrityError:
+                # 相同内容被并发上传且对方先写入，重新查询以复用其记录
+                continue
+        raise RuntimeError("重复上传冲突")
 
-    # 保存到数据库
-    db = SessionLocal()
+    # 保存到数据库，SQLite提交涉及磁盘同步，放到工作线程中执行
     try:
-        file_record = UploadedFile(
-            unique_filename=unique_filename,
-            original_filename=file.filename,
-            file_path=absolute_path,  # 存储绝对路径
-            file_type="video" if file.content_type and file.content_type.startswith("video/") else "unknown"
-        )
-        db.add(file_record)
-        db.commit()
-        db.refresh(file_record)
+        existing_filename = await asyncio.to_thread(save_record)
+        if existing_filename is not None:
+            logger.info(f"上传内容与已有文件相同，复用: {existing_filename}")
+            await asyncio.to_thread(remove_if_exists, absolute_path)
+            unique_filename = existing_filename
     except Exception as e:
         logger.error(f"数据库保存文件记录失败: {e}")
-        if os.path.exists(absolute_path):
-            os.remove(absolute_path)
+        await asyncio.to_thread(remove_if_exists, absolute_path)
         raise HTTPException(status_code=500, detail="Failed to save file record")
-    finally:
-        db.close()
 
     # 返回URL路径供前端访问
     return {
@@ -442,19 +1371,19 @@ async def upload_file(file: Annotated[UploadFile, File()]):
         "unique_filename": unique_filename,
         "path": f"uploads/{unique_filename}",  # 返回不带前导斜杠的相对路径
         "url": f"uploads/{unique_filename}",  # 用于前端访问的URL路径，不带前导斜杠
-        "size": len(content)
+        "size": size
     }
 
 @app.post("/cut")
-async def cut_video(background_tasks: BackgroundTasks, request: CutRequest):
+async def cut_video(request: CutRequest):
     """异步剪切视频API"""
     try:
         # 基本验证
-        if not os.path.exists(request.file_path):
+        if not await asyncio.to_thread(os.path.exists, request.file_path):
             # 尝试从relative_path转换为absolute_path
             file_name = os.path.basename(request.file_path)
             absolute_path = os.path.join(directories["uploads"], file_name)
-            if not os.path.exists(absolute_path):
+            if not await asyncio.to_thread(os.path.exists, absolute_path):
                 raise FileNotFoundError(f"视频文件不存在: {request.file_path}")
             file_path = absolute_path
         else:
@@ -463,32 +1392,48 @@ async def cut_video(background_tasks: BackgroundTasks, request: CutRequest):
         if not request.delete_segments:
             raise HTTPException(status_code=400, detail="No segments to delete specified")
         
-        # 检查并发任务数量
-        active_tasks = sum(1 for task in processing_tasks.values() if task["status"] == "processing")
-        if active_tasks >= MAX_CONCURRENT_JOBS:
-            raise HTTPException(status_code=429, detail="Too many concurrent processing jobs")
-        
         # 生成任务ID
-        task_id = str(uuid4())
+        task_id = token_urlsafe(16)
+        
+        # 检查并发任务数量（使用队列时由worker数量限制并发）
+        if cut_queue is None and not await asyncio.to_thread(acquire_cut_slot, task_id):
+            raise HTTPException(status_code=429, detail="Too many concurrent processing jobs")
         
         # 初始化任务状态
-        processing_tasks[task_id] = {
-            "task_id": task_id,
-            "status": "processing",
-            "progress": 0,
-            "result": None,
-            "error_message": None,
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
-        }
+        try:
+            await asyncio.to_thread(create_task, task_id)
+        except Exception:
+            if cut_queue is None:
+                await asyncio.to_thread(release_cut_slot, task_id)
+            raise
         
-        # 提交后台任务
-        background_tasks.add_task(
-            process_video_cutting,
-            task_id,
-            file_path,  # 使用已经处理过的绝对路径
-            request.delete_segments
-        )
+        if cut_queue is not None:
+            # 提交到Redis队列，任务ID即job ID
+            await asyncio.to_thread(
+                cut_queue.enqueue,
+                process_video_cutting,
+                task_id,
+                file_path,
+                request.delete_segments,
+                request.precise,
+                request.preview,
+                job_id=task_id,
+                job_timeout=CUT_JOB_TIMEOUT,
+                result_ttl=TASK_RESULT_TTL,
+                failure_ttl=TASK_RESULT_TTL
+            )
+        else:
+            # 提交到剪切专用线程池，不占用事件循环和通用线程池；
+            # 线程池大小为 MAX_CONCURRENT_JOBS，与并发名额一致
+            asyncio.get_running_loop().run_in_executor(
+                executor,
+                run_cut_task,
+                task_id,
+                file_path,  # 使用已经处理过的绝对路径
+                request.delete_segments,
+                request.precise,
+                request.preview
+            )
         
         return {
             "task_id": task_id,
@@ -505,19 +1450,27 @@ async def cut_video(background_tasks: BackgroundTasks, request: CutRequest):
 @app.get("/cut/status/{task_id}")
 async def get_cut_status(task_id: str):
     """获取剪切任务状态"""
+    if redis_client is not None:
+        # 已结束的任务由Redis按TTL过期，无需在此清理
+        task = await asyncio.to_thread(get_task, task_id)
+        if task is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+        
+        # worker崩溃或超时时任务函数来不及写回状态
+        if cut_queue is not None and task["status"] == "processing":
+            try:
+                job = await asyncio.to_thread(Job.fetch, task_id, connection=redis_client)
+            except NoSuchJobError:
+                job = None
+            if job is not None and job.is_failed:
+                task.update(status="failed", error_message="Worker failed or timed out")
+        return format_task(task)
+    
     if task_id not in processing_tasks:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    task = processing_tasks[task_id]
-    
-    # 清理完成超过1小时的任务
-    if task["status"] in ["completed", "failed"]:
-        time_diff = datetime.utcnow() - task["updated_at"]
-        if time_diff.total_seconds() > 3600:  # 1小时
-            del processing_tasks[task_id]
-            raise HTTPException(status_code=404, detail="Task expired")
-    
-    return task
+    # 过期任务由 periodic_task_sweep 定期清理
+    return format_task(processing_tasks[task_id])
 
 @app.post("/transcribe")
 async def transcribe_audio(request: TranscribeRequest):
@@ -533,15 +1486,84 @@ async def transcribe_audio(request: TranscribeRequest):
     try:
         # 处理JSON请求方式
         absolute_path = os.path.join(backend_dir, request.file_path)
-        results = transcription_service.transcribe(absolute_path, request.model)
+        async with transcription_slot(request.model):
+            service = await load_transcription_service()
+            results = await asyncio.to_thread(service.transcribe, absolute_path, request.model)
         response = {"transcript": results}
-        print(f"转录API响应: {response}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"转录API响应: {response}")
         return response
             
     except Exception as e:
         logger.error(f"转录过程出错: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/transcribe_batch")
+async def transcribe_audio_batch(request: TranscribeBatchRequest):
+    """
+    批量转录多个短音频文件，一次请求提交，各文件并发识别并复用识别器池
+    
+    Args:
+        request: 批量转录请求
+        
+    Returns:
+        与 file_paths 顺序一致的结果列表，单个文件失败不影响其他文件
+    """
+    # 识别成功的 (绝对路径, 转录结果)，全部完成后在同一事务中保存
+    completed = []
+
+    async def transcribe_one(file_path: str) -> Dict:
+        absolute_path = os.path.join(backend_dir, file_path)
+        try:
+            async with transcription_slot(request.model):
+                service = await load_transcription_service()
+                results = await asyncio.to_thread(service.transcribe, absolute_path, request.model, False)
+            if results:
+                completed.append((absolute_path, results))
+            return {"file_path": file_path, "transcript": results}
+        except Exception as e:
+            logger.error(f"批量转录失败 {file_path}: {e}")
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            return {"file_path": file_path, "error": detail}
+    
+    results = await asyncio.gather(*(transcribe_one(path) for path in request.file_paths))
+    if completed:
+        service = await load_transcription_service()
+        try:
+            await asyncio.to_thread(service.save_many_to_database, completed, request.model)
+        except Exception as e:
+            # 转录结果已经得到，保存失败时仍返回识别结果
+            logger.error(f"批量转录结果保存失败: {e}")
+    return {"results": results}
+
+@app.post("/transcribe_stream")
+async def transcribe_audio_stream(request: TranscribeRequest):
+    """
+    流式转录音频文件 - 以NDJSON逐行返回词语，客户端无需等待整个文件识别完成
+    
+    Args:
+        request: 转录请求
+        
+    Returns:
+        application/x-ndjson 流，每行一个词语；出错时最后一行为 {"error": ...}
+    """
+    absolute_path = os.path.join(backend_dir, request.file_path)
+    if not await asyncio.to_thread(os.path.exists, absolute_path):
+        raise HTTPException(status_code=404, detail=f"File not found: {request.file_path}")
+
+    async def generate():
+        async with transcription_slot(request.model):
+            try:
+                service = await load_transcription_service()
+                segments = service.transcribe_stream(absolute_path, request.model)
+                async for words in iterate_in_threadpool(segments):
+                    yield b"".join(orjson.dumps(word) + b"\n" for word in words)
+            except Exception as e:
+                logger.error(f"流式转录过程出错: {e}")
+                yield orjson.dumps({"error": getattr(e, "detail", None) or str(e)}) + b"\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
 @app.post("/transcribe_file")
 async def transcribe_file_upload(file: UploadFile = File(...), model: str = Form("vosk")):
     """
@@ -561,24 +1583,26 @@ async def transcribe_file_upload(file: UploadFile = File(...), model: str = Form
         
         # 保存临时文件
         file_extension = Path(file.filename).suffix.lower()
-        temp_filename = f"temp_{uuid4()}{file_extension}"
+        temp_filename = f"temp_{token_urlsafe(16)}{file_extension}"
         temp_path = os.path.join(directories["temp"], temp_filename)
         
-        content = await file.read()
-        with open(temp_path, "wb") as f:
-            f.write(content)
-        
         try:
-            # 执行转录
-            results = transcription_service.transcribe(temp_path, model)
+            await save_upload(file, temp_path)
+            
+            # 在工作线程中执行转录，避免阻塞事件循环
+            async with transcription_slot(model):
+                service = await load_transcription_service()
+                results = await asyncio.to_thread(service.transcribe, temp_path, model)
             response = {"transcript": results}
-            print(f"文件上传转录API响应: {response}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"文件上传转录API响应: {response}")
             return response
         finally:
-            # 清理临时文件
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+            # 清理临时文件，遗漏的文件由定期清理任务兜底
+            await asyncio.to_thread(remove_if_exists, temp_path)
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"转录过程出错: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -587,9 +1611,14 @@ async def transcribe_file_upload(file: UploadFile = File(...), model: str = Form
 async def clip_video(
     file_path: Annotated[str, Body()],
     start_time: Annotated[float, Body()],
-    end_time: Annotated[float, Body()]
+    end_time: Annotated[float, Body()],
+    precise: Annotated[bool, Body()] = False
 ):
-    """剪辑视频片段"""
+    """
+    剪辑视频片段
+    
+    默认直接复制码流，起点对齐到之前最近的关键帧；precise为True时重新编码以得到精确的起止点。
+    """
     # 根据文件路径中的目录确定查找位置
     if file_path.startswith('processed_videos/'):
         absolute_path = os.path.join(directories["processed_videos"], os.path.basename(file_path))
@@ -600,7 +1629,9 @@ async def clip_video(
     
     logger.info(f"clip_video: 使用文件路径 {absolute_path}")
     
-    if not os.path.exists(absolute_path):
+    try:
+        st = await asyncio.to_thread(os.stat, absolute_path)
+    except FileNotFoundError:
         raise HTTPException(status_code=400, detail=f"Video file not found: {file_path}")
     
     file_path = absolute_path
@@ -608,68 +1639,151 @@ async def clip_video(
     if start_time < 0 or end_time <= start_time:
         raise HTTPException(status_code=400, detail="Invalid time range")
 
-    # 检查时间范围是否在视频时长内
+    # 根据源文件（路径、修改时间、大小）和时间范围生成确定的输出文件名，相同的剪辑请求直接复用已有结果；
+    # processed_videos 中的文件可能被同名的新剪切结果覆盖，源文件变化后文件名随之变化，不会复用旧剪辑
+    clip_key = hashlib.blake2b(
+        f"{file_path}:{st.st_mtime_ns}:{st.st_size}:{start_time}:{end_time}:{int(precise)}".encode(),
+        digest_size=8
+    ).hexdigest()
+    output_filename = f"clip_{Path(file_path).stem}_{clip_key}.mp4"
+    output_path = os.path.join(directories["clips"], output_filename)
+    clip_result = {
+        "success": True,
+        "clip_path": output_path,
+        "clip_url": f"clips/{output_filename}",  # 不带前导斜杠，与其他接口保持一致
+        "duration": end_time - start_time
+    }
+
+    if await asyncio.to_thread(is_nonempty_file, output_path):
+        logger.info(f"clip_video: 命中已有剪辑 {output_filename}")
+        return clip_result
+
+    # 检查时间范围是否在视频时长内（FFprobe在工作线程中执行）
     try:
-        duration = get_video_duration(file_path)
-        if end_time > duration:
-            raise HTTPException(status_code=400, detail=f"End time exceeds video duration ({duration}s)")
+        duration = await asyncio.to_thread(get_video_duration, file_path)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get video duration: {e}")
+    if end_time > duration:
+        raise HTTPException(status_code=400, detail=f"End time exceeds video duration ({duration}s)")
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_filename = f"clip_{os.path.basename(file_path)}_{start_time}_{end_time}_{timestamp}.mp4"
-    output_path = os.path.join(directories["clips"], output_filename)
+    # 先写入临时文件再原子替换，避免并发的相同请求读到未写完的剪辑
+    temp_output_path = os.path.join(directories["temp"], f"clip_{clip_key}_{token_urlsafe(16)}.mp4")
 
-    command = [
-        "ffmpeg", "-y",
-        "-i", file_path,
-        "-ss", str(start_time),
-        "-to", str(end_time),
-        "-c:v", "libx264",
-        "-c:a", "aac",
-        "-preset", "fast",
-        "-movflags", "+faststart",
-        output_path
-    ]
+    # -ss 放在 -i 之前使用输入定位，直接跳到起点附近的关键帧，无需解码起点之前的内容
+    if precise:
+        command = [
+            *hw_device_args(detect_hw_encoder()),
+            "-ss", str(start_time),
+            "-i", file_path,
+            "-t", str(end_time - start_time),
+            *build_encode_args(),
+            "-c:a", "aac",
+            "-movflags", "+faststart",
+            "-avoid_negative_ts", "make_zero",
+            temp_output_path
+        ]
+    else:
+        # 复制码流时输入定位会落在起点之前的关键帧上，省去全部解码和编码
+        command = [
+            "-ss", str(start_time),
+            "-i", file_path,
+            "-t", str(end_time - start_time),
+            "-c", "copy",
+            "-movflags", "+faststart",
+            "-avoid_negative_ts", "make_zero",
+            temp_output_path
+        ]
 
     try:
-        result = subprocess.run(command, check=True, capture_output=True, timeout=300)
+        async with clip_semaphore:
+            await run_ffmpeg_async(command, 300)
         
-        if not os.path.exists(output_path):
+        try:
+            await asyncio.to_thread(os.replace, temp_output_path, output_path)
+        except FileNotFoundError:
             raise Exception("Output file was not created")
             
-        return {
-            "success": True,
-            "clip_path": output_path,
-            "clip_url": f"clips/{output_filename}",  # 不带前导斜杠，与其他接口保持一致
-            "duration": end_time - start_time
-        }
+        return clip_result
     except subprocess.TimeoutExpired:
         raise HTTPException(status_code=408, detail="Video clipping timeout")
     except subprocess.CalledProcessError as e:
-        error_msg = e.stderr.decode() if e.stderr else str(e)
+        error_msg = e.stderr if e.stderr else str(e)
         raise HTTPException(status_code=500, detail=f"FFmpeg error: {error_msg}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Clipping failed: {str(e)}")
+    finally:
+        await asyncio.to_thread(remove_if_exists, temp_output_path)
 
 # 清理任务的后台服务
 @app.on_event("startup")
 async def startup_event():
-    """应用启动时的初始化任务"""
+    """应用启动时的初始化任务，在每个worker进程中执行"""
+    global executor, clip_semaphore, transcription_semaphore, sensevoice_semaphore
     logger.info("Video Processing API started")
+    executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_JOBS)
+    clip_semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+    transcription_semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+    sensevoice_semaphore = asyncio.Semaphore(1)
+    # 丢弃可能从主进程继承的数据库连接，由本进程重新建立
+    engine.dispose(close=False)
+    init_db()
     cleanup_temp_files()
+    # 在线程中完成编码器检测，避免首个剪切请求承担检测开销
+    await asyncio.to_thread(detect_hw_encoder)
+    app.state.cleanup_task = asyncio.create_task(periodic_temp_cleanup())
+    app.state.sweep_task = None
+    if redis_client is None:
+        # 使用Redis时任务状态按TTL自动过期，无需清理
+        app.state.sweep_task = asyncio.create_task(periodic_task_sweep())
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """应用关闭时的清理任务"""
     logger.info("Shutting down Video Processing API")
+    app.state.cleanup_task.cancel()
+    if app.state.sweep_task is not None:
+        app.state.sweep_task.cancel()
     executor.shutdown(wait=True)
 
 # --- 静态文件服务配置 ---
 # 注意：这些配置必须放在所有路由定义之后
 from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse
+
+class MediaFileResponse(FileResponse):
+    """按1MB分块读取的文件响应，减少大视频传输时的读调用次数"""
+    chunk_size = 1 << 20
+
+# 上传文件以随机令牌命名；剪辑文件名由源文件的路径、修改时间、大小和时间范围决定（见 clip_video），
+# 源文件被覆盖后剪辑文件名随之变化，同名文件内容不会变化，浏览器可长期缓存
+IMMUTABLE_CACHE_CONTROL = "public, max-age=86400, immutable"
+
+class MediaStaticFiles(StaticFiles):
+    """视频静态文件服务；服务器支持 http.response.pathsend 时由服务器直接零拷贝发送"""
+    def __init__(self, *args, cache_control: Optional[str] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control
+    
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = MediaFileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        if self.cache_control:
+            response.headers["Cache-Control"] = self.cache_control
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
 
-# 挂载静态文件目录
-app.mount("/uploads", StaticFiles(directory=directories["uploads"]), name="uploads")
-app.mount("/clips", StaticFiles(directory=directories["clips"]), name="clips")
-app.mount("/processed_videos", StaticFiles(directory=directories["processed_videos"]), name="processed_videos")
+# 挂载静态文件目录；由nginx等前置服务器直接提供媒体文件时（见 nginx.conf）不再挂载
+if not STATIC_DELEGATED:
+    app.mount(
+        "/uploads",
+        MediaStaticFiles(directory=directories["uploads"], cache_control=IMMUTABLE_CACHE_CONTROL),
+        name="uploads"
+    )
+    app.mount(
+        "/clips",
+        MediaStaticFiles(directory=directories["clips"], cache_control=IMMUTABLE_CACHE_CONTROL),
+        name="clips"
+    )
+    app.mount("/processed_videos", MediaStaticFiles(directory=directories["processed_videos"]), name="processed_videos")
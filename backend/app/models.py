@@ -1,21 +1,25 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime
-from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
+from typing import Optional
 
-Base = declarative_base()
+from sqlalchemy import String, DateTime, LargeBinary
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+class Base(DeclarativeBase):
+    pass
 
 class UploadedFile(Base):
     __tablename__ = 'uploaded_files'
-    id = Column(Integer, primary_key=True)
-    unique_filename = Column(String(50), unique=True)
-    original_filename = Column(String(200))
-    file_path = Column(String(200))
-    upload_time = Column(DateTime, default=datetime.utcnow)
-    file_type = Column(String(50))
+    id: Mapped[int] = mapped_column(primary_key=True)
+    unique_filename: Mapped[Optional[str]] = mapped_column(String(50), unique=True)
+    original_filename: Mapped[Optional[str]] = mapped_column(String(200))
+    file_path: Mapped[Optional[str]] = mapped_column(String(200), index=True)
+    upload_time: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+    file_type: Mapped[Optional[str]] = mapped_column(String(50))
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), unique=True)  # 文件内容的SHA-256，用于上传去重
 
 class Transcription(Base):
     __tablename__ = 'transcriptions'
-    id = Column(Integer, primary_key=True)
-    file_path = Column(String(200))
-    results = Column(Text)
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    id: Mapped[int] = mapped_column(primary_key=True)
+    file_path: Mapped[Optional[str]] = mapped_column(String(200), unique=True)  # 每个文件只保留最新一次转录结果
+    results: Mapped[Optional[bytes]] = mapped_column(LargeBinary)  # zstd压缩后的JSON词语列表
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
@@ -16,12 +16,32 @@ Author: AI Assistant
 Date: 2024
 """
 
+import bisect
 import json
 import re
 import string
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 from difflib import SequenceMatcher
 
+# 可选依赖：安装 rapidfuzz 后用其C实现计算相似度，未安装时回退到 difflib
+try:
+    from rapidfuzz.fuzz import ratio as rapidfuzz_ratio
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+
+
+# 清理文本时移除的标点符号：string.punctuation 处理ASCII标点，再加上中文标点
+CHINESE_PUNCTUATION = '，。！？；："（）【】《》、'
+# str.isspace() 为真的全部字符
+WHITESPACE = (
+    '\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680'
+    '\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a'
+    '\u2028\u2029\u202f\u205f\u3000'
+)
+# 删除标点和空白的转换表，str.translate 在C层面逐字符查表
+CLEAN_TRANSLATION = str.maketrans('', '', string.punctuation + CHINESE_PUNCTUATION + WHITESPACE)
+
 
 class TextMatcher:
     """
@@ -36,6 +56,8 @@ class TextMatcher:
             similarity_threshold (float): 相似度阈值，默认0.8
         """
         self.similarity_threshold = similarity_threshold
+        # 清理结果缓存；同一个匹配器处理多个任务时（见 batch_process），相同的词语只需清理一次
+        self._clean_cache: Dict[str, str] = {}
     
     def clean_text(self, text: str) -> str:
         """
@@ -47,13 +69,11 @@ class TextMatcher:
         Returns:
             str: 清理后的文本
         """
-        # 移除标点符号和空格
-        # 使用string.punctuation处理ASCII标点，再处理中文标点
-        chinese_punctuation = '，。！？；："（）【】《》、'
-        all_punctuation = string.punctuation + chinese_punctuation
-        
-        # 移除所有标点符号和空格
-        cleaned = "".join(char for char in text if char not in all_punctuation and not char.isspace())
+        cleaned = self._clean_cache.get(text)
+        if cleaned is None:
+            # 移除所有标点符号和空格
+            cleaned = text.translate(CLEAN_TRANSLATION)
+            self._clean_cache[text] = cleaned
         return cleaned
     
     def calculate_similarity(self, word1: str, word2: str) -> float:
@@ -65,9 +85,25 @@ class TextMatcher:
             word2 (str): 词语2
             
         Returns:
-            float: 相似度分数 (0-1)
+            float: 相似度分数 (0-1)；低于相似度阈值时可能直接返回0.0
         """
-        return SequenceMatcher(None, word1, word2).ratio()
+        if word1 == word2:
+            return 1.0
+        if not word1 or not word2:
+            return 0.0
+        
+        if RAPIDFUZZ_AVAILABLE:
+            # 基于最长公共子序列的归一化相似度，得分低于 score_cutoff 时提前终止并返回0
+            return rapidfuzz_ratio(word1, word2, score_cutoff=self.similarity_threshold * 100) / 100
+        
+        # 关闭autojunk，避免长文本时高频字符被当作噪声
+        matcher = SequenceMatcher(None, word1, word2, autojunk=False)
+        # 先用开销很小的上界估计排除不可能达到阈值的情况
+        if matcher.real_quick_ratio() < self.similarity_threshold:
+            return 0.0
+        if matcher.quick_ratio() < self.similarity_threshold:
+            return 0.0
+        return matcher.ratio()
     
     def find_best_match_sequence(self, redundant_words: List[Dict[str, Any]], 
                                  target_text: str) -> List[Dict[str, Any]]:
@@ -86,46 +122,36 @@ class TextMatcher:
         combined_words = self._combine_characters_to_words(redundant_words, target_text)
         
         cleaned_target = self.clean_text(target_text)
+        target_len = len(cleaned_target)
         result = []
         target_pos = 0
-        used_indices = set()  # 记录已使用的词语索引，避免重复使用
+        
+        # 用清理后的候选词语构建字典树，每个位置只需沿目标文本向下查找一次，
+        # 不必在每个位置遍历全部候选词语。每个词语只出现在一个结点的索引列表中，
+        # 使用后直接从列表弹出即可避免重复使用，无需另外记录已使用的索引
+        trie = self._build_word_trie(combined_words)
         
         # 按顺序匹配目标文本
-        while target_pos < len(cleaned_target):
-            best_match = None
+        while target_pos < target_len:
+            best_terminals = None
             best_match_len = 0
-            best_index = -1
             
-            # 寻找当前位置的最佳匹配（优先长词语）
-            for i, word_obj in enumerate(combined_words):
-                if i in used_indices:  # 跳过已使用的词语
-                    continue
-                    
-                word = self.clean_text(word_obj['word'])
-                word_len = len(word)
-                
-                # 跳过空词语（只包含标点符号的词语）
-                if word_len == 0:
-                    continue
-                
-                # 检查是否可以在当前位置精确匹配
-                if target_pos + word_len <= len(cleaned_target):
-                    target_segment = cleaned_target[target_pos:target_pos + word_len]
-                    
-                    # 只进行精确匹配，确保结果文本与目标文本完全一致
-                    if word == target_segment:
-                        # 选择最长的匹配，如果长度相同则选择置信度更高的
-                        if (word_len > best_match_len or 
-                            (word_len == best_match_len and best_match is not None and word_obj.get('conf', 0) > best_match.get('conf', 0)) or
-                            (word_len == best_match_len and best_match is None)):
-                            best_match = word_obj
-                            best_match_len = word_len
-                            best_index = i
+            # 寻找当前位置的最佳匹配（优先长词语）：记录仍有未使用词语的最深结点
+            node = trie
+            for depth in range(target_pos, target_len):
+                node = node[0].get(cleaned_target[depth])
+                if node is None:
+                    break
+                if node[1]:
+                    best_terminals = node[1]
+                    best_match_len = depth - target_pos + 1
+                # 没有更长的候选词语时提前结束查找
+                if not node[0]:
+                    break
             
             # 如果找到匹配，添加到结果中
-            if best_match:
-                result.append(best_match)
-                used_indices.add(best_index)
+            if best_terminals:
+                result.append(combined_words[best_terminals.pop()])
                 target_pos += best_match_len
             else:
                 # 如果没有找到匹配，跳过当前字符
@@ -133,6 +159,39 @@ class TextMatcher:
         
         return result
     
+    def _build_word_trie(self, words: List[Dict[str, Any]]) -> list:
+        """
+        用清理后的词语构建字典树
+        
+        每个结点为 [子结点字典, 结束于该结点的词语索引列表]，索引按置信度升序存放，
+        置信度相同时原有顺序靠前者放在后面，因此列表末尾即为该长度下的最佳匹配，可用 pop() 取出。
+        只包含标点符号的词语清理后为空，不加入字典树。
+        
+        Args:
+            words (List[Dict]): 候选词语列表
+            
+        Returns:
+            list: 字典树根结点
+        """
+        root = [{}, []]
+        for i, word_obj in enumerate(words):
+            word = self.clean_text(word_obj['word'])
+            if not word:
+                continue
+            node = root
+            for char in word:
+                node = node[0].setdefault(char, [{}, []])
+            node[1].append(i)
+        
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if len(node[1]) > 1:
+                node[1].sort(key=lambda i: -words[i].get('conf', 0))
+                node[1].reverse()
+            stack.extend(node[0].values())
+        return root
+    
     def _combine_characters_to_words(self, redundant_words: List[Dict[str, Any]], 
                                    target_text: str) -> List[Dict[str, Any]]:
         """
@@ -145,8 +204,13 @@ class TextMatcher:
         Returns:
             List[Dict]: 组合后的词语列表
         """
-        # 按时间顺序排序
-        sorted_words = sorted(redundant_words, key=lambda x: x.get('start', 0))
+        # 按时间顺序排序；识别结果通常已按时间排列，先用一次线性检查确认，只有乱序时才排序
+        starts = [w.get('start', 0) for w in redundant_words]
+        if all(a <= b for a, b in zip(starts, starts[1:])):
+            sorted_words = redundant_words
+        else:
+            # 预先取出起始时间并带上原始下标，排序时直接比较元组，且保持稳定排序的顺序
+            sorted_words = [w for _, _, w in sorted(zip(starts, range(len(starts)), redundant_words))]
         
         combined = []
         i = 0
@@ -160,17 +224,20 @@ class TextMatcher:
             
             # 尝试向后组合连续的字符
             j = i + 1
+            # 当前文本在目标文本中出现的所有起始位置，组合时只需检查这些位置之后能否接上下一个词语，
+            # 不必每次都在整个目标文本中重新查找组合后的文本
+            positions = self._find_occurrences(target_text, current_text) if j < len(sorted_words) else []
             while j < len(sorted_words):
                 next_word = sorted_words[j]
                 next_text = next_word['word']
                 
-                # 检查是否是连续的字符
-                combined_text = current_text + next_text
-                
                 # 检查组合后的文本是否在目标文本中连续出现
-                if combined_text in target_text:
+                offset = len(current_text)
+                next_positions = [pos for pos in positions if target_text.startswith(next_text, pos + offset)]
+                if next_positions:
                     # 组合这两个字符
-                    current_text = combined_text
+                    current_text = current_text + next_text
+                    positions = next_positions
                     current_end = next_word.get('end', current_end)
                     current_conf = max(current_conf, next_word.get('conf', 0))  # 取较高的置信度
                     j += 1
@@ -189,78 +256,56 @@ class TextMatcher:
             i = j
         
         # 添加原始的多字符词语（如果有的话）
+        # 组合词语按起始时间排序，每个词语只需检查起始时间相差不到0.1秒的少量组合词语；
+        # 新加入的词语同样参与后续检查，因此插入时保持有序。
+        # 组合词语依次取自已排序的 sorted_words，本身即按起始时间有序，无需再次排序
+        start_keys = [combined_word['start'] for combined_word in combined]
+        start_words = list(combined)
+        
         for word_obj in redundant_words:
             if len(word_obj['word']) > 1:
+                word_start = word_obj.get('start', 0)
+                # 检索范围略微放宽以容忍浮点误差，范围内再做精确判断
+                lo = bisect.bisect_left(start_keys, word_start - 0.1 - 1e-9)
+                hi = bisect.bisect_right(start_keys, word_start + 0.1 + 1e-9)
+                
                 # 检查是否已经被包含在组合词语中
                 already_included = False
-                for combined_word in combined:
-                    if (word_obj['word'] in combined_word['word'] and 
-                        abs(word_obj.get('start', 0) - combined_word.get('start', 0)) < 0.1):
+                for k in range(lo, hi):
+                    if (word_obj['word'] in start_words[k]['word'] and 
+                        abs(word_start - start_keys[k]) < 0.1):
                         already_included = True
                         break
                 
                 if not already_included:
                     combined.append(word_obj)
+                    k = bisect.bisect_right(start_keys, word_start)
+                    start_keys.insert(k, word_start)
+                    start_words.insert(k, word_obj)
         
         # 按长度降序排序，优先使用长词语
         combined.sort(key=lambda x: (-len(x['word']), x.get('start', 0)))
         
         return combined
+    
+    @staticmethod
+    def _find_occurrences(text: str, sub: str) -> List[int]:
+        """
+        查找子串在文本中出现的所有起始位置（允许重叠）
         
-        # 处理标点符号
-        # 检查结果文本是否与目标文本一致
-        result_text = ''.join([item['word'] for item in result])
-        
-        # 如果结果文本与目标文本不一致，尝试添加缺失的标点符号
-        if result_text != target_text:
-            # 寻找未使用的标点符号词语，按照在目标文本中的位置顺序添加
-            target_chars = list(target_text)
-            result_chars = list(result_text)
-            final_result = []
-            
-            target_idx = 0
-            result_idx = 0
-            
-            while target_idx < len(target_chars) and result_idx < len(result_chars):
-                if target_chars[target_idx] == result_chars[result_idx]:
-                    # 字符匹配，继续
-                    target_idx += 1
-                    result_idx += 1
-                else:
-                    # 字符不匹配，可能是缺少标点符号
-                    missing_char = target_chars[target_idx]
-                    
-                    # 寻找对应的标点符号词语
-                    punctuation_found = False
-                    for i, word_obj in enumerate(redundant_words):
-                        if i not in used_indices and word_obj['word'] == missing_char:
-                            # 找到对应的标点符号，插入到适当位置
-                            # 根据当前已处理的结果确定插入位置
-                            insert_pos = len([item for item in result if ''.join([c for c in item['word'] if c.strip()]) != ''])
-                            if insert_pos <= len(final_result):
-                                final_result.insert(insert_pos, word_obj)
-                            else:
-                                final_result.append(word_obj)
-                            used_indices.add(i)
-                            punctuation_found = True
-                            break
-                    
-                    if punctuation_found:
-                        target_idx += 1
-                    else:
-                        # 如果没找到对应的标点符号，跳过
-                        target_idx += 1
-            
-            # 将原始匹配结果按顺序添加到final_result中
-            for item in result:
-                if item not in final_result:
-                    final_result.append(item)
+        Args:
+            text (str): 文本
+            sub (str): 子串
             
-            # 按照start时间排序
-            final_result.sort(key=lambda x: x.get('start', 0))
-            return final_result
-        
-        return result
+        Returns:
+            List[int]: 升序排列的起始位置
+        """
+        positions = []
+        pos = text.find(sub)
+        while pos != -1:
+            positions.append(pos)
+            pos = text.find(sub, pos + 1)
+        return positions
     
     def greedy_match(self, redundant_words: List[Dict[str, Any]], 
                     target_text: str) -> List[Dict[str, Any]]:
@@ -275,25 +320,32 @@ class TextMatcher:
             List[Dict]: 匹配的词语序列
         """
         cleaned_target = self.clean_text(target_text)
+        target_len = len(cleaned_target)
         result = []
         target_pos = 0
         
+        # 循环内频繁使用的方法和属性先绑定为局部变量，省去每次的属性查找
+        clean_text = self.clean_text
+        calculate_similarity = self.calculate_similarity
+        threshold = self.similarity_threshold
+        append = result.append
+        startswith = cleaned_target.startswith
+        
         for word_obj in redundant_words:
-            word = self.clean_text(word_obj['word'])
+            word = clean_text(word_obj['word'])
             word_len = len(word)
             
             # 检查是否可以在当前位置匹配
-            if target_pos + word_len <= len(cleaned_target):
-                target_segment = cleaned_target[target_pos:target_pos + word_len]
-                
-                # 精确匹配或相似度匹配
-                if (word == target_segment or 
-                    self.calculate_similarity(word, target_segment) >= self.similarity_threshold):
-                    result.append(word_obj)
+            if target_pos + word_len <= target_len:
+                # 精确匹配或相似度匹配；精确匹配用 startswith 原地比较，
+                # 只有需要计算相似度时才切出目标片段
+                if (startswith(word, target_pos) or
+                        calculate_similarity(word, cleaned_target[target_pos:target_pos + word_len]) >= threshold):
+                    append(word_obj)
                     target_pos += word_len
                     
                     # 如果已经匹配完整个目标文本，提前结束
-                    if target_pos >= len(cleaned_target):
+                    if target_pos >= target_len:
                         break
         
         return result
@@ -302,7 +354,8 @@ class TextMatcher:
 def match_and_filter(redundant_json: List[Dict[str, Any]], 
                     target_text: str, 
                     use_dp: bool = True,
-                    similarity_threshold: float = 0.8) -> List[Dict[str, Any]]:
+                    similarity_threshold: float = 0.8,
+                    matcher: Optional[TextMatcher] = None) -> List[Dict[str, Any]]:
     """
     主要的匹配和过滤函数
     
@@ -318,6 +371,8 @@ def match_and_filter(redundant_json: List[Dict[str, Any]],
         target_text (str): 去冗余后的目标文本字符串
         use_dp (bool): 是否使用动态规划算法，默认True（更准确但稍慢）
         similarity_threshold (float): 相似度匹配阈值，默认0.8
+        matcher (TextMatcher): 可选的匹配器实例，多个任务共用时可复用其清理缓存；
+            提供时忽略 similarity_threshold
         
     Returns:
         List[Dict]: 过滤后的词语段列表，保持原有的JSON结构
@@ -338,7 +393,8 @@ def match_and_filter(redundant_json: List[Dict[str, Any]],
         return []
     
     # 创建文本匹配器实例
-    matcher = TextMatcher(similarity_threshold=similarity_threshold)
+    if matcher is None:
+        matcher = TextMatcher(similarity_threshold=similarity_threshold)
     
     # 根据参数选择匹配算法
     if use_dp:
@@ -361,6 +417,10 @@ def batch_process(data_list: List[Tuple[List[Dict[str, Any]], str]],
     Returns:
         List[List[Dict]]: 批量处理结果列表
     """
+    # 所有任务共用一个匹配器，同一说话人的连续片段词汇重复度高，词语清理结果可以跨任务复用
+    if 'matcher' not in kwargs:
+        kwargs['matcher'] = TextMatcher(similarity_threshold=kwargs.get('similarity_threshold', 0.8))
+    
     results = []
     for redundant_json, target_text in data_list:
         result = match_and_filter(redundant_json, target_text, **kwargs)
@@ -1,16 +1,26 @@
-import json
 import logging
+import re
 import subprocess
 import os
-import tempfile
-import wave
-from typing import List, Dict
+import io
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+from typing import List, Dict, Iterator, Tuple
+import numpy as np
+import orjson
+import zstandard
 from vosk import Model, KaldiRecognizer
 from fastapi import HTTPException
-from .database import SessionLocal
+from sqlalchemy.dialects.sqlite import insert
+from .database import engine
 from .models import Transcription
 from funasr.utils.postprocess_utils import rich_transcription_postprocess
 
+# 只获取logger，不重新配置basicConfig
+logger = logging.getLogger(__name__)
+
 # SenseVoice imports
 try:
     from funasr import AutoModel
@@ -18,23 +28,49 @@ try:
     SENSEVOICE_AVAILABLE = True
 except ImportError:
     SENSEVOICE_AVAILABLE = False
-    print("Warning: FunASR not installed. SenseVoice model will not be available.")
-    print("To install: pip install funasr")
+    logger.warning("FunASR not installed. SenseVoice model will not be available. To install: pip install funasr")
 
-# 配置日志
-import logging
+# 每次送入Vosk的PCM字节数（16kHz单声道s16le下32000字节为1秒），默认2秒，
+# 略小于Linux默认的64KB管道容量，一次read即可取满；可通过环境变量调整
+VOSK_CHUNK_BYTES = int(os.environ.get("VOSK_CHUNK_BYTES", 64000))
 
-# 只获取logger，不重新配置basicConfig
-logger = logging.getLogger(__name__)
+# 转录结果入库时的zstd压缩级别
+ZSTD_LEVEL = 3
+# zstd帧的魔数，用于区分压缩数据和旧版本保存的JSON文本
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+# 转录结果入库语句，同一文件重复转录时覆盖旧结果；模块加载时构建一次，单条与批量保存共用
+_upsert = insert(Transcription)
+TRANSCRIPTION_UPSERT = _upsert.on_conflict_do_update(
+    index_elements=["file_path"],
+    set_={
+        "results": _upsert.excluded.results,
+        "created_at": _upsert.excluded.created_at
+    }
+)
+# 等待FFmpeg退出的超时时间（秒）及保留的stderr行数
+FFMPEG_WAIT_TIMEOUT = 300
+FFMPEG_STDERR_LINES = 20
+# 设置 SENSEVOICE_DEBUG=1 时，每次SenseVoice转换的中间结果写入 debug_output 目录，默认关闭
+SENSEVOICE_DEBUG = os.environ.get("SENSEVOICE_DEBUG") == "1"
+# SenseVoice输出中的语言、情感等特殊标记，如 <|zh|>、<|HAPPY|>
+SENSEVOICE_TAG_RE = re.compile(r'<\|[^|]*\|>')
+# SenseVoice文本分词：中文按字符、英文按词；紧跟在英文/标点之后的中文字符会与其后的英文/标点合为一个词
+SENSEVOICE_WORD_RE = re.compile(
+    r'(?<=[^\s\u4e00-\u9fff])[\u4e00-\u9fff][^\s\u4e00-\u9fff]*'
+    r'|[\u4e00-\u9fff]'
+    r'|[^\s\u4e00-\u9fff]+'
+)
 
 class TranscriptionService:
-    def __init__(self, model_path: str, temp_dir: str):
+    def __init__(self, model_path: str, temp_dir: str, recognizer_pool_size: int = 4, load_sensevoice: bool = True):
         """
         初始化转录服务
         
         Args:
             model_path: Vosk模型路径
             temp_dir: 临时文件目录
+            recognizer_pool_size: 缓存的Vosk识别器数量上限
+            load_sensevoice: 是否立即加载SenseVoice模型；为False时推迟到首次SenseVoice转录时加载
         """
         vosk_model_path = os.path.join(model_path, "vosk-model-small-cn-0.22")
         sensevoice_model_path = os.path.join(model_path, "iic", "SenseVoiceSmall")
@@ -44,10 +80,28 @@ class TranscriptionService:
         else:
             self.model = Model(vosk_model_path)
         
+        # 识别器复用池，避免每次请求重新构建解码图；启动时预先创建，请求路径上不再分配
+        self._recognizer_pool = queue.Queue(maxsize=recognizer_pool_size)
+        if self.model is not None:
+            for _ in range(recognizer_pool_size):
+                self._recognizer_pool.put_nowait(self._new_recognizer())
         self.sensevoice_model = None
+        self._sensevoice_model_path = sensevoice_model_path
+        self._sensevoice_loaded = False
+        self._sensevoice_lock = threading.Lock()
         self.temp_dir = temp_dir
         os.makedirs(temp_dir, exist_ok=True)
-        self._load_sensevoice_model(sensevoice_model_path)
+        if load_sensevoice:
+            self.load_sensevoice_model()
+    
+    def load_sensevoice_model(self):
+        """加载SenseVoice模型，只在首次调用时加载，加载失败时不再重试"""
+        if self._sensevoice_loaded:
+            return
+        with self._sensevoice_lock:
+            if not self._sensevoice_loaded:
+                self._load_sensevoice_model(self._sensevoice_model_path)
+                self._sensevoice_loaded = True
     
     def _load_sensevoice_model(self, model_path: str):
         """加载SenseVoice模型"""
@@ -76,85 +130,149 @@ class TranscriptionService:
             logger.error(f"加载SenseVoice模型失败: {e}")
             self.sensevoice_model = None
     
-    def _convert_to_wav(self, input_file: str) -> str:
+    def _new_recognizer(self) -> KaldiRecognizer:
+        """创建一个新的识别器"""
+        rec = KaldiRecognizer(self.model, 16000)
+        rec.SetWords(True)  # 启用词级别的时间戳
+        return rec
+
+    def _acquire_recognizer(self) -> KaldiRecognizer:
+        """从复用池中取出一个识别器，池为空或识别器重置失败时新建"""
+        try:
+            rec = self._recognizer_pool.get_nowait()
+        except queue.Empty:
+            return self._new_recognizer()
+        try:
+            rec.Reset()
+        except Exception as e:
+            logger.warning(f"识别器重置失败，重新创建: {e}")
+            rec = self._new_recognizer()
+        return rec
+
+    def _release_recognizer(self, rec: KaldiRecognizer):
+        """将识别器放回复用池，池已满时直接丢弃"""
+        try:
+            self._recognizer_pool.put_nowait(rec)
+        except queue.Full:
+            pass
+
+    def _open_pcm_stream(self, input_file: str) -> subprocess.Popen:
         """
-        将输入音频转换为WAV格式
+        启动FFmpeg，将输入音频解码为16kHz单声道s16le原始PCM并写入管道
         
         Args:
             input_file: 输入文件路径
             
         Returns:
-            WAV文件路径
+            FFmpeg进程，stdout为PCM数据流
         """
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False, dir=self.temp_dir) as temp_file:
-            audio_output_path = temp_file.name
-
         command = [
-            "ffmpeg", "-y",
+            "ffmpeg",
             "-i", input_file,
+            "-f", "s16le",
             "-acodec", "pcm_s16le",
             "-ar", "16000",
             "-ac", "1",
-            audio_output_path
+            "-loglevel", "error",
+            "pipe:1"
         ]
 
-        logger.info(f"开始转换音频: {input_file}")
-        result = subprocess.run(command, check=True, capture_output=True, timeout=300)
+        logger.info(f"开始解码音频: {input_file}")
+        return subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0  # 无缓冲管道，read() 直接从内核拷贝到bytes，省去一次中间缓冲拷贝
+        )
+
+    @staticmethod
+    def _drain_stderr(stream, tail: deque) -> None:
+        """
+        在后台线程中持续读取FFmpeg的stderr，避免管道写满导致FFmpeg阻塞
+        
+        Args:
+            stream: FFmpeg进程的stderr管道
+            tail: 保存最后若干行错误输出的有界队列
+        """
+        with stream:
+            for line in iter(stream.readline, b""):
+                tail.append(line)
+
+    def _iter_vosk_segments(self, file_path: str) -> Iterator[List[Dict]]:
+        """
+        使用Vosk进行语音识别，FFmpeg解码与识别通过管道并行进行，每识别出一段即产出
         
-        if not os.path.exists(audio_output_path) or os.path.getsize(audio_output_path) == 0:
-            raise Exception("Failed to create valid audio file")
+        Args:
+            file_path: 音频/视频文件路径
             
-        return audio_output_path
+        Yields:
+            每段识别出的词语列表，每个元素包含词语和时间戳信息
+        """
+        rec = self._acquire_recognizer()
+        try:
+            proc = self._open_pcm_stream(file_path)
+            stderr_tail = deque(maxlen=FFMPEG_STDERR_LINES)
+            stderr_thread = threading.Thread(
+                target=self._drain_stderr, args=(proc.stderr, stderr_tail), daemon=True
+            )
+            stderr_thread.start()
+            logger.info("开始语音识别...")
+            
+            try:
+                # 原始管道读取可能返回不足VOSK_CHUNK_BYTES的数据，Vosk接受任意长度的PCM块
+                while data := proc.stdout.read(VOSK_CHUNK_BYTES):
+                    if rec.AcceptWaveform(data):
+                        result = orjson.loads(rec.Result())
+                        # 完整结果可能包含数百个词语，仅在DEBUG级别下格式化输出
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug(f"中间结果: {result}")
+                        if result.get("result"):
+                            yield result["result"]
+            finally:
+                proc.stdout.close()
+                try:
+                    returncode = proc.wait(timeout=FFMPEG_WAIT_TIMEOUT)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                    returncode = proc.wait()
+                stderr_thread.join()
 
-    def _transcribe_wav(self, wav_file: str) -> List[Dict]:
+            if returncode != 0:
+                raise subprocess.CalledProcessError(
+                    returncode, proc.args,
+                    stderr=b"".join(stderr_tail).decode("utf-8", errors="replace")
+                )
+
+            final_result = orjson.loads(rec.FinalResult())
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"最终结果: {final_result}")
+            if final_result.get("result"):
+                yield final_result["result"]
+        except (GeneratorExit, subprocess.CalledProcessError):
+            raise
+        except Exception:
+            # 识别过程中出错时识别器状态不可信，丢弃而不放回池中
+            rec = None
+            raise
+        finally:
+            if rec is not None:
+                self._release_recognizer(rec)
+
+    def _transcribe_vosk(self, file_path: str) -> List[Dict]:
         """
         使用Vosk进行语音识别
         
         Args:
-            wav_file: WAV音频文件路径
+            file_path: 音频/视频文件路径
             
         Returns:
             识别结果列表，每个元素包含词语和时间戳信息
         """
-        wf = wave.open(wav_file, "rb")
-        
-        if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getframerate() != 16000:
-            logger.error("音频格式不正确，需要单声道16kHz 16bit WAV")
-            raise HTTPException(status_code=400, detail="Audio format must be mono 16kHz 16bit WAV")
-        
-        rec = KaldiRecognizer(self.model, wf.getframerate())
-        rec.SetWords(True)  # 启用词级别的时间戳
-        
         results = []
-        logger.info("开始语音识别...")
-        
-        while True:
-            data = wf.readframes(4000)
-            if len(data) == 0:
-                break
-            if rec.AcceptWaveform(data):
-                result = json.loads(rec.Result())
-                logger.info(f"中间结果: {result}")
-                if "result" in result and result["result"]:
-                    logger.info(f"result['result']的值: {result['result']}")
-                    results.extend(result["result"])
-
-        final_result = json.loads(rec.FinalResult())
-        logger.info(f"最终结果: {final_result}")
-        if "result" in final_result and final_result["result"]:
-            logger.info(f"final_result['result']的值: {final_result['result']}")
-            results.extend(final_result["result"])
-        
-        # 提取完整文本和时间戳
-        full_text = " ".join([word.get("word", "") for word in results])
-        word_timestamps = []
+        for words in self._iter_vosk_segments(file_path):
+            results.extend(words)
         
-        for word_info in results:
-            word_timestamps.append([
-                word_info.get("start", 0),
-                word_info.get("end", 0)
-            ])
-                
         logger.info(f"识别完成，获得 {len(results)} 个词语")
         
         # 直接返回词语列表，前端需要每个词语的详细信息
@@ -170,6 +288,7 @@ class TranscriptionService:
         Returns:
             识别结果列表，每个元素包含词语和时间戳信息
         """
+        self.load_sensevoice_model()
         if self.sensevoice_model is None:
             raise HTTPException(status_code=503, detail="SenseVoice service unavailable")
         
@@ -217,19 +336,9 @@ class TranscriptionService:
         """
         results = []
         
-        # 调试输出：记录输入数据
-        import os
-        import json
-        from datetime import datetime
-        
-        debug_dir = "debug_output"
-        if not os.path.exists(debug_dir):
-            os.makedirs(debug_dir)
-        
-        timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-        debug_file = os.path.join(debug_dir, f"sensevoice_debug_{timestamp_str}.txt")
-        
-        with open(debug_file, 'w', encoding='utf-8') as f:
+        # 调试输出：记录输入数据；仅在开启 SENSEVOICE_DEBUG 时收集，结束时一次性写入文件
+        f = io.StringIO() if SENSEVOICE_DEBUG else None
+        if f is not None:
             f.write(f"=== SenseVoice 转换调试信息 ===\n")
             f.write(f"时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
             f.write(f"原始文本: {repr(text)}\n")
@@ -239,92 +348,82 @@ class TranscriptionService:
         # 清理文本，移除SenseVoice的特殊标记
         clean_text = text
         # 移除语言标记和情感标记
-        import re
-        clean_text = re.sub(r'<\|[^|]*\|>', '', clean_text)
+        clean_text = SENSEVOICE_TAG_RE.sub('', clean_text)
         clean_text = clean_text.strip()
         
         # 调试输出：记录清理后的文本
-        with open(debug_file, 'a', encoding='utf-8') as f:
+        if f is not None:
             f.write(f"清理后文本: {repr(clean_text)}\n")
             f.write(f"文本长度: {len(clean_text)}\n\n")
         
         if not clean_text or not timestamps:
-            with open(debug_file, 'a', encoding='utf-8') as f:
+            if f is not None:
                 f.write(f"提前返回：文本为空或时间戳为空\n")
+                self._write_sensevoice_debug(f.getvalue())
             return results
         
         # 将文本按字符分割（对中文更合适）或按词分割（对英文更合适）
         # 这里采用混合策略：中文按字符，英文按词
-        words = []
-        current_word = ""
-        
-        for char in clean_text:
-            if char.isspace():
-                if current_word:
-                    words.append(current_word)
-                    current_word = ""
-            elif '\u4e00' <= char <= '\u9fff':  # 中文字符
-                if current_word and not ('\u4e00' <= current_word[-1] <= '\u9fff'):
-                    words.append(current_word)
-                    current_word = char
-                else:
-                    if current_word:
-                        words.append(current_word)
-                    words.append(char)
-                    current_word = ""
-            else:  # 英文字符和标点
-                current_word += char
-        
-        if current_word:
-            words.append(current_word)
+        words = SENSEVOICE_WORD_RE.findall(clean_text)
         
         # 调试输出：记录分词结果
-        with open(debug_file, 'a', encoding='utf-8') as f:
+        if f is not None:
             f.write(f"分词结果:\n")
             f.write(f"词语数量: {len(words)}\n")
             f.write(f"词语列表: {words}\n\n")
         
         # 将时间戳分配给词语
         if len(words) > 0 and len(timestamps) > 0:
-            # 如果时间戳数量多于词语数量，尝试合理分配
-            if len(timestamps) >= len(words):
-                # 平均分配时间戳
-                for i, word in enumerate(words):
-                    if i < len(timestamps):
-                        start_ms, end_ms = timestamps[i]
-                        results.append({
-                            "word": word,
-                            "start": start_ms / 1000.0,  # 转换为秒
-                            "end": end_ms / 1000.0,
-                            "conf": 0.9  # SenseVoice没有置信度，设置默认值
-                        })
-            else:
-                # 时间戳数量少于词语数量，需要插值
-                for i, word in enumerate(words):
-                    # 计算在时间戳数组中的位置
-                    timestamp_index = int(i * len(timestamps) / len(words))
-                    if timestamp_index >= len(timestamps):
-                        timestamp_index = len(timestamps) - 1
-                    
-                    start_ms, end_ms = timestamps[timestamp_index]
-                    results.append({
-                        "word": word,
-                        "start": start_ms / 1000.0,
-                        "end": end_ms / 1000.0,
-                        "conf": 0.9
-                    })
+            # 一次性换算为秒，再按词语序号取出对应的时间戳
+            ts_seconds = np.asarray(timestamps, dtype=np.float64).reshape(-1, 2) / 1000.0
+            word_indices = np.arange(len(words))
+            if len(timestamps) < len(words):
+                # 时间戳数量少于词语数量，需要插值：按比例映射到时间戳数组中的位置
+                word_indices = np.minimum(word_indices * len(timestamps) // len(words), len(timestamps) - 1)
+            # 时间戳数量不少于词语数量时，第i个词语直接使用第i个时间戳
+            starts = ts_seconds[word_indices, 0].tolist()
+            ends = ts_seconds[word_indices, 1].tolist()
+            results = [
+                # SenseVoice没有置信度，设置默认值
+                {"word": word, "start": start, "end": end, "conf": 0.9}
+                for word, start, end in zip(words, starts, ends)
+            ]
         
         # 调试输出：记录最终结果
-        with open(debug_file, 'a', encoding='utf-8') as f:
+        if f is not None:
             f.write(f"时间戳分配策略: {'平均分配' if len(timestamps) >= len(words) else '插值分配'}\n")
             f.write(f"最终结果数量: {len(results)}\n")
             f.write(f"最终结果:\n")
             for i, result in enumerate(results):
                 f.write(f"  [{i}] {result['word']} -> {result['start']:.3f}s - {result['end']:.3f}s (conf: {result['conf']})\n")
             f.write(f"\n=== 调试信息结束 ===\n")
+            self._write_sensevoice_debug(f.getvalue())
         
         return results
     
+    @staticmethod
+    def _write_sensevoice_debug(content: str):
+        """将SenseVoice转换的调试信息写入 debug_output 目录下的新文件"""
+        debug_dir = "debug_output"
+        os.makedirs(debug_dir, exist_ok=True)
+        timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        debug_file = os.path.join(debug_dir, f"sensevoice_debug_{timestamp_str}.txt")
+        with open(debug_file, 'w', encoding='utf-8') as f:
+            f.write(content)
+    
+    @staticmethod
+    def _compress_results(results: List[Dict]) -> bytes:
+        """将词语列表序列化为JSON并用zstd压缩，词语条目重复度高，压缩比通常在5倍以上"""
+        # ZstdCompressor实例不能跨线程共用，转录在线程池中执行，因此每次新建
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(orjson.dumps(results))
+
+    @staticmethod
+    def load_results(data: bytes) -> List[Dict]:
+        """解压并解析数据库中保存的转录结果；旧版本保存的是未压缩的JSON文本，直接解析"""
+        if isinstance(data, str) or not data.startswith(ZSTD_MAGIC):
+            return orjson.loads(data)
+        return orjson.loads(zstandard.ZstdDecompressor().decompress(data))
+
     def _save_to_database(self, file_path: str, results: List[Dict], model: str = "vosk"):
         """
         将转录结果保存到数据库
@@ -334,28 +433,65 @@ class TranscriptionService:
             results: 转录结果列表
             model: 使用的模型名称
         """
+        self.save_many_to_database([(file_path, results)], model)
+
+    def save_many_to_database(self, items: List[Tuple[str, List[Dict]]], model: str = "vosk"):
+        """
+        批量保存转录结果，所有条目在同一事务中以 executemany 写入
+        
+        Args:
+            items: (原始文件路径, 转录结果列表) 的列表
+            model: 使用的模型名称
+        """
+        if not items:
+            return
         try:
-            db = SessionLocal()
-            transcription = Transcription(
-                file_path=file_path,
-                results=json.dumps(results, ensure_ascii=False)
-            )
-            db.add(transcription)
-            db.commit()
-            logger.info(f"转录结果已保存到数据库: {file_path} (模型: {model})")
+            # 直接使用Core连接执行，不经过ORM Session
+            params = [
+                {"file_path": file_path, "results": self._compress_results(results)}
+                for file_path, results in items
+            ]
+            with engine.begin() as conn:
+                conn.execute(TRANSCRIPTION_UPSERT, params)
+            for file_path, _ in items:
+                logger.info(f"转录结果已保存到数据库: {file_path} (模型: {model})")
         except Exception as e:
             logger.error(f"保存到数据库失败: {e}")
             raise
-        finally:
-            db.close()
 
-    def transcribe(self, file_path: str, model: str = "vosk") -> List[Dict]:
+    def transcribe_stream(self, file_path: str, model: str = "vosk") -> Iterator[List[Dict]]:
+        """
+        流式转录，Vosk每识别出一段即产出；SenseVoice不支持分段，识别完成后一次性产出
+        全部产出完毕后将完整结果保存到数据库
+        
+        Args:
+            file_path: 音频文件路径
+            model: 使用的模型 ("vosk" 或 "sensevoice")
+            
+        Yields:
+            每段识别出的词语列表
+        """
+        if model.lower() == "sensevoice":
+            segments = iter([self._transcribe_sensevoice(file_path)])
+        else:
+            segments = self._iter_vosk_segments(file_path)
+
+        results = []
+        for words in segments:
+            results.extend(words)
+            yield words
+
+        if results:
+            self._save_to_database(file_path, results, model)
+
+    def transcribe(self, file_path: str, model: str = "vosk", save: bool = True) -> List[Dict]:
         """
         执行完整的音频转录工作流
         
         Args:
             file_path: 音频文件路径
             model: 使用的模型 ("vosk" 或 "sensevoice")
+            save: 是否将结果保存到数据库；批量转录时为False，由调用方通过 save_many_to_database 统一保存
             
         Returns:
             转录结果列表
@@ -363,35 +499,23 @@ class TranscriptionService:
         if not os.path.exists(file_path):
             raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
 
-        temp_wav = None
         try:
             # 根据模型选择进行转录
             if model.lower() == "sensevoice":
                 results = self._transcribe_sensevoice(file_path)
             else:
-                # 默认使用Vosk模型
-                # 转换音频为WAV格式
-                temp_wav = self._convert_to_wav(file_path)
-                
-                # 执行语音识别
-                results = self._transcribe_wav(temp_wav)
+                # 默认使用Vosk模型，音频通过管道直接送入识别器
+                results = self._transcribe_vosk(file_path)
             
             # 保存结果到数据库
-            if results:
+            if save and results:
                 self._save_to_database(file_path, results, model)
             
             return results
 
         except subprocess.CalledProcessError as e:
-            logger.error(f"音频转换失败: {e}")
+            logger.error(f"音频转换失败: {e}\n{e.stderr or ''}")
             raise HTTPException(status_code=500, detail="Audio conversion failed")
         except Exception as e:
             logger.error(f"转录过程出错: {e}")
             raise HTTPException(status_code=500, detail=str(e))
-        finally:
-            # 清理临时WAV文件
-            if temp_wav and os.path.exists(temp_wav):
-                try:
-                    os.remove(temp_wav)
-                except Exception as e:
-                    logger.warning(f"清理临时文件失败: {e}")
@@ -0,0 +1,22 @@
+# Gunicorn 部署配置
+# 启动方式（在 backend 目录下）: gunicorn -c gunicorn.conf.py app.main:app
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# 未配置 REDIS_URL 时，剪切任务状态保存在各worker进程内存中，多worker时状态查询可能落到其他进程，
+# 因此默认单worker；配置Redis后任务状态跨进程共享，可通过 WEB_CONCURRENCY 增加worker
+workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+
+# 在主进程中导入 app.main，并在 when_ready 中加载Vosk模型，fork出的worker通过写时复制共享只读的模型内存，
+# N个worker只加载一次模型。模型加载后不得再修改，识别器等可变状态由各worker自行创建。
+# 线程池、信号量等每个worker独立的状态在 app.main 的 startup_event 中创建，不在导入时创建。
+# SenseVoice 运行在 cuda:0 上，CUDA 上下文无法跨 fork 继承，因此主进程中不加载，由各worker在首次使用时加载。
+preload_app = os.environ.get("PRELOAD_APP", "1") == "1"
+
+def when_ready(server):
+    """主进程就绪、fork worker 之前调用；preload 时在此只加载Vosk模型，供所有worker共享"""
+    if preload_app:
+        from app.main import get_transcription_service
+        get_transcription_service(load_sensevoice=False)
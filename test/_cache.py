@@ -0,0 +1,64 @@
+"""
+测试脚本的转录响应缓存
+
+同一文件、同一模型的转录请求在调试时会被反复发送，每次都要等待服务端重新识别。
+成功的响应以请求内容和音频文件修改时间为键缓存到 test/.cache/ 目录，
+文件未变化且缓存未过期时直接返回，服务端代码修改后可用 --no-cache 重新请求。
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import time
+
+test_dir = os.path.dirname(os.path.abspath(__file__))
+# 请求中的 file_path 相对于后端目录
+backend_dir = os.path.join(os.path.dirname(test_dir), "backend")
+CACHE_DIR = os.path.join(test_dir, ".cache")
+
+
+def _cache_key(url, json_body):
+    """由URL、请求内容和所引用文件的修改时间计算缓存键，文件被替换后缓存自动失效"""
+    file_path = os.path.join(backend_dir, json_body.get("file_path", ""))
+    try:
+        mtime = os.stat(file_path).st_mtime_ns
+    except OSError:
+        mtime = 0
+    raw = f"{url}\n{json.dumps(json_body, sort_keys=True)}\n{mtime}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def cached_post(session, url, json_body, ttl=3600, refresh=False, **kwargs):
+    """
+    发送JSON POST请求，成功的响应缓存到本地磁盘
+
+    Args:
+        session: requests.Session
+        url: 请求地址
+        json_body: 请求体
+        ttl: 缓存有效期（秒）
+        refresh: 为True时忽略已有缓存，重新请求并更新缓存
+        **kwargs: 传给 session.post 的其他参数
+
+    Returns:
+        requests.Response
+    """
+    cache_file = os.path.join(CACHE_DIR, f"{_cache_key(url, json_body)}.pkl")
+    if not refresh:
+        try:
+            if time.time() - os.path.getmtime(cache_file) < ttl:
+                with open(cache_file, "rb") as f:
+                    return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            pass
+
+    response = session.post(url, json=json_body, **kwargs)
+    if response.status_code == 200:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # 先写临时文件再替换，避免并发运行的脚本读到写了一半的缓存
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "wb") as f:
+            pickle.dump(response, f)
+        os.replace(tmp_file, cache_file)
+    return response
@@ -0,0 +1,30 @@
+"""
+测试脚本共用的HTTP会话
+
+所有脚本通过同一个 requests.Session 访问后端，复用连接池，
+同一主机上的后续请求不必重新建立TCP连接。
+GET请求在连接失败或网关返回502/503/504时按指数退避自动重试，POST（剪切、上传等）不重试，避免重复提交；
+每次请求都应传入 timeout=TIMEOUT，服务端无响应时及时失败而不是一直等待。
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (连接超时, 读取超时)，读取超时需覆盖服务端完成一次转录的时间
+TIMEOUT = (3, 120)
+
+# 只有GET会重试：POST不是幂等的，/cut 重试会重复创建任务，流式上传的请求体也无法重新发送；
+# connect=3 在连接建立失败时重试，请求尚未发出，对所有方法都是安全的。
+# 重试用尽后返回最后一次的响应，由脚本自行输出状态码
+RETRY = Retry(
+    total=3,
+    connect=3,
+    backoff_factor=0.5,
+    status_forcelist=(502, 503, 504),
+    allowed_methods={"GET"},
+    raise_on_status=False
+)
+
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(max_retries=RETRY, pool_connections=4, pool_maxsize=8))
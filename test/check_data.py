@@ -1,8 +1,17 @@
-import requests
-import json
+import argparse
 
-response = requests.post('http://127.0.0.1:8000/transcribe', json={'file_path': 'uploads/test.mp4', 'model': 'vosk'})
-data = response.json()
+import orjson
+
+from _cache import cached_post
+from _http import SESSION, TIMEOUT
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--no-cache', action='store_true', help='忽略本地缓存的转录结果，重新请求服务端')
+args = parser.parse_args()
+
+response = cached_post(SESSION, 'http://127.0.0.1:8000/transcribe', {'file_path': 'uploads/test.mp4', 'model': 'vosk'},
+                       refresh=args.no_cache, timeout=TIMEOUT)
+data = orjson.loads(response.content)
 
 print('Response structure:')
 print('Keys:', list(data.keys()))
@@ -13,4 +22,4 @@ if isinstance(data['transcript'], list) and len(data['transcript']) > 0:
     print('First element type:', type(data['transcript'][0]))
     if isinstance(data['transcript'][0], dict):
         print('First element keys:', list(data['transcript'][0].keys()))
-        print('First element:', json.dumps(data['transcript'][0], indent=2, ensure_ascii=False))
\ No newline at end of file
+        print('First element:', orjson.dumps(data['transcript'][0], option=orjson.OPT_INDENT_2).decode())
\ No newline at end of file
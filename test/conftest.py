@@ -0,0 +1,38 @@
+"""
+pytest共用配置：各测试模块共享同一个HTTP会话，连接在整个测试会话内复用
+"""
+
+import pytest
+import requests
+
+from _http import SESSION
+
+BASE_URL = "http://127.0.0.1:8000"
+
+# 以下为直接运行的调试脚本，导入时即发送请求并解析命令行参数，不作为pytest测试收集
+collect_ignore = [
+    "check_data.py",
+    "test_sensevoice.py",
+    "test_sensevoice_format.py",
+    "test_sensevoice_words.py",
+    "test_transcribe.py",
+    "test_transcribe_fix.py",
+    "test_upload.py",
+]
+
+
+@pytest.fixture(scope="session")
+def base_url():
+    return BASE_URL
+
+
+@pytest.fixture(scope="session")
+def session(base_url):
+    """后端服务未启动时跳过依赖该fixture的测试"""
+    try:
+        # 探测不经过会话的重试机制，服务未启动时立即跳过
+        requests.get(base_url, timeout=3)
+    except requests.exceptions.ConnectionError:
+        pytest.skip(f"后端服务未启动: {base_url}")
+    yield SESSION
+    SESSION.close()
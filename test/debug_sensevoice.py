@@ -1,30 +1,47 @@
 import sys
 sys.path.append('backend')
+import functools
 import traceback
 from app.transcription_service import TranscriptionService
 
-try:
-    # 创建转录服务实例
-    model_path = "backend/vosk-model-small-cn-0.22"
-    temp_dir = "backend/temp"
-    service = TranscriptionService(model_path, temp_dir)
-    print("TranscriptionService创建成功")
-    
-    # 测试SenseVoice转录
-    file_path = "backend/uploads/test.mp4"
+model_path = "backend/vosk-model-small-cn-0.22"
+temp_dir = "backend/temp"
+
+
+@functools.lru_cache(maxsize=None)
+def get_service(model_path, temp_dir):
+    """按 (模型路径, 临时目录) 缓存服务实例，同一进程内只加载一次模型"""
+    return TranscriptionService(model_path, temp_dir)
+
+
+def debug_transcribe(file_path):
+    """
+    使用缓存的服务实例执行SenseVoice转录并打印结果；
+    以 python -i test/debug_sensevoice.py 运行后可反复调用，不必重新加载模型
+    """
+    service = get_service(model_path, temp_dir)
     print(f"开始测试SenseVoice转录: {file_path}")
-    
+
     results = service._transcribe_sensevoice(file_path)
     print(f"转录成功，结果类型: {type(results)}")
     print(f"结果数量: {len(results)}")
-    
+
     if len(results) > 0:
         print(f"第一个结果: {results[0]}")
         print(f"前5个结果:")
         for i, result in enumerate(results[:5]):
             print(f"  {i+1}: {result}")
-    
+    return results
+
+
+try:
+    get_service(model_path, temp_dir)
+    print("TranscriptionService创建成功")
+
+    # 测试SenseVoice转录
+    debug_transcribe("backend/uploads/test.mp4")
+
 except Exception as e:
     print(f"发生错误: {e}")
     print("详细错误信息:")
-    traceback.print_exc()
\ No newline at end of file
+    traceback.print_exc()
@@ -0,0 +1,42 @@
+"""
+剪切规划测试
+
+直接调用后端的剪切规划函数，不需要启动后端服务：
+
+    pytest test/test_cut_planning.py
+"""
+
+import os
+import sys
+
+import pytest
+
+test_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.join(os.path.dirname(test_dir), "backend")
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+# app.main 导入转录服务，依赖 vosk 与 funasr
+pytest.importorskip("vosk")
+pytest.importorskip("funasr")
+from app.main import calculate_keep_segments, pieces_to_segments, plan_smart_cut
+
+# 每5秒一个关键帧
+KEYFRAMES = [0.0, 5.0, 10.0, 15.0, 20.0, 25.0]
+
+
+def test_short_deletes_are_removed_between_keyframes():
+    keep = calculate_keep_segments(30, [{"start": 10.5, "end": 11.0}, {"start": 15.2, "end": 15.8}])
+    pieces = plan_smart_cut(keep, KEYFRAMES, precise=True)
+    # 输出的时间段与保留片段一致，删除区间没有被带回
+    assert pieces_to_segments(pieces) == keep
+    # 只有不在关键帧上的片头重新编码
+    assert [piece for piece in pieces if not piece["copy"]] == [
+        {"start": 11.0, "end": 15.0, "copy": False},
+        {"start": 15.8, "end": 20.0, "copy": False},
+    ]
+
+
+def test_single_segment_snaps_to_previous_keyframe():
+    pieces = plan_smart_cut([{"start": 11.0, "end": 30.0}], KEYFRAMES, precise=False)
+    assert pieces == [{"start": 10.0, "end": 30.0, "copy": True}]
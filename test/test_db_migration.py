@@ -0,0 +1,158 @@
+"""
+数据库结构升级测试
+
+在旧版表结构的数据库副本上执行 init_db，检查上传去重和转录结果写入可以正常进行。
+不需要启动后端服务：
+
+    pytest test/test_db_migration.py
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+
+import pytest
+from sqlalchemy import create_engine, insert as core_insert
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import IntegrityError
+
+test_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.join(os.path.dirname(test_dir), "backend")
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+from app.database import init_db
+from app.models import Transcription, UploadedFile
+
+# 仓库中随附的数据库，表结构早于当前模型
+TRACKED_DB = os.path.join(backend_dir, "transcriptions.db")
+
+# 引入内容哈希与zstd压缩之前的表结构
+BASELINE_SCHEMA = """
+CREATE TABLE uploaded_files (
+    id INTEGER NOT NULL,
+    unique_filename VARCHAR(50),
+    original_filename VARCHAR(200),
+    file_path VARCHAR(200),
+    upload_time DATETIME,
+    file_type VARCHAR(50),
+    PRIMARY KEY (id),
+    UNIQUE (unique_filename)
+);
+CREATE TABLE transcriptions (
+    id INTEGER NOT NULL,
+    file_path VARCHAR(200),
+    results TEXT,
+    created_at DATETIME,
+    PRIMARY KEY (id)
+);
+"""
+
+
+def upsert_transcription(conn, file_path, results):
+    """与转录服务相同的 ON CONFLICT(file_path) 写入"""
+    stmt = insert(Transcription).values(file_path=file_path, results=results)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["file_path"],
+        set_={"results": stmt.excluded.results, "created_at": stmt.excluded.created_at}
+    )
+    conn.execute(stmt)
+
+
+def insert_upload(conn, unique_filename, content_hash):
+    conn.execute(core_insert(UploadedFile).values(
+        unique_filename=unique_filename,
+        original_filename=unique_filename,
+        file_path=f"uploads/{unique_filename}",
+        file_type="video",
+        content_hash=content_hash
+    ))
+
+
+def check_upload_dedup(engine):
+    """升级后相同内容哈希的上传记录只能写入一条"""
+    with engine.begin() as conn:
+        insert_upload(conn, "a.mp4", "h" * 64)
+    with pytest.raises(IntegrityError):
+        with engine.begin() as conn:
+            insert_upload(conn, "b.mp4", "h" * 64)
+
+
+def check_transcription_upsert(engine):
+    """升级后同一文件的转录结果按 file_path 覆盖"""
+    with engine.begin() as conn:
+        upsert_transcription(conn, "uploads/a.mp4", b"1")
+        upsert_transcription(conn, "uploads/a.mp4", b"2")
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(
+            "SELECT results FROM transcriptions WHERE file_path = 'uploads/a.mp4'"
+        ).fetchall()
+    assert rows == [(b"2",)]
+
+
+def test_migrate_tracked_db(tmp_path):
+    if not os.path.exists(TRACKED_DB):
+        pytest.skip("仓库中没有随附的数据库")
+    db_path = tmp_path / "transcriptions.db"
+    shutil.copyfile(TRACKED_DB, db_path)
+    engine = create_engine(f"sqlite:///{db_path}")
+
+    init_db(bind=engine)
+    check_upload_dedup(engine)
+    check_transcription_upsert(engine)
+
+    # 旧的 transcription 列中的JSON文本迁移到 results 列
+    with engine.connect() as conn:
+        missing = conn.exec_driver_sql(
+            "SELECT COUNT(*) FROM transcriptions WHERE transcription IS NOT NULL AND results IS NULL"
+        ).scalar()
+    assert missing == 0
+
+
+def test_migrate_baseline_schema(tmp_path):
+    db_path = tmp_path / "baseline.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(BASELINE_SCHEMA)
+        conn.executemany(
+            "INSERT INTO transcriptions (file_path, results) VALUES (?, ?)",
+            [("uploads/x.mp4", "[]"), ("uploads/x.mp4", '[{"word": "新"}]'), ("uploads/y.mp4", "[]")]
+        )
+    engine = create_engine(f"sqlite:///{db_path}")
+
+    init_db(bind=engine)
+    # 重复执行不应出错
+    init_db(bind=engine)
+
+    # 同一文件只保留最新的一条
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(
+            "SELECT file_path, results FROM transcriptions ORDER BY file_path"
+        ).fetchall()
+    assert rows == [("uploads/x.mp4", '[{"word": "新"}]'), ("uploads/y.mp4", "[]")]
+    with engine.connect() as conn:
+        names = {row[1] for row in conn.exec_driver_sql("PRAGMA index_list(uploaded_files)")}
+    assert "ix_uploaded_files_file_path" in names
+    check_upload_dedup(engine)
+    check_transcription_upsert(engine)
+
+
+def test_fresh_db_has_no_duplicate_indexes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    init_db(bind=engine)
+    init_db(bind=engine)
+    with engine.connect() as conn:
+        names = {row[1] for row in conn.exec_driver_sql("PRAGMA index_list(transcriptions)")}
+        names |= {row[1] for row in conn.exec_driver_sql("PRAGMA index_list(uploaded_files)")}
+    assert "ix_transcriptions_file_path" not in names
+    assert "ix_uploaded_files_content_hash" not in names
+    check_upload_dedup(engine)
+    check_transcription_upsert(engine)
+
+
+def test_load_results_accepts_legacy_json():
+    pytest.importorskip("vosk")
+    from app.transcription_service import TranscriptionService
+    words = [{"word": "你", "start": 0.0, "end": 0.1, "conf": 0.9}]
+    assert TranscriptionService.load_results('[{"word": "你", "start": 0.0, "end": 0.1, "conf": 0.9}]') == words
+    assert TranscriptionService.load_results(TranscriptionService._compress_results(words)) == words
@@ -0,0 +1,66 @@
+"""
+MP4时长读取测试
+
+在临时目录中构造最小的MP4盒结构，检查直接读取mvhd时长及回退到ffprobe的情况，
+不需要启动后端服务：
+
+    pytest test/test_mp4_duration.py
+"""
+
+import os
+import struct
+import subprocess
+import sys
+
+import pytest
+
+test_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.join(os.path.dirname(test_dir), "backend")
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+# app.main 导入转录服务，依赖 vosk 与 funasr
+pytest.importorskip("vosk")
+pytest.importorskip("funasr")
+import app.main as main
+
+
+def box(box_type, payload):
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def mvhd(timescale, duration):
+    """version 0 的mvhd：version/flags、创建与修改时间、timescale、duration，其余字段不读取"""
+    return box(b"mvhd", struct.pack(">I8xII", 0, timescale, duration) + bytes(80))
+
+
+def write_mp4(path, timescale, duration, fragmented=False):
+    data = box(b"ftyp", b"isom" + bytes(4)) + box(b"moov", mvhd(timescale, duration))
+    if fragmented:
+        data += box(b"moof", bytes(8))
+    data += box(b"mdat", bytes(16))
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_read_mvhd_duration(tmp_path):
+    path = write_mp4(tmp_path / "a.mp4", 1000, 12500)
+    assert main.read_mp4_duration(path) == 12.5
+
+
+def test_fragmented_mp4_has_no_mvhd_duration(tmp_path):
+    path = write_mp4(tmp_path / "frag.mp4", 1000, 0, fragmented=True)
+    assert main.read_mp4_duration(path) is None
+
+
+def test_fragmented_mp4_falls_back_to_ffprobe(tmp_path, monkeypatch):
+    path = write_mp4(tmp_path / "frag.mp4", 1000, 0, fragmented=True)
+    calls = []
+
+    def fake_run(command, **kwargs):
+        calls.append(command)
+        return subprocess.CompletedProcess(command, 0, stdout='{"format": {"duration": "7.25"}}', stderr="")
+
+    monkeypatch.setattr(main.subprocess, "run", fake_run)
+    assert main.get_video_duration(path) == 7.25
+    assert calls and calls[0][0] == "ffprobe"
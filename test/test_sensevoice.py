@@ -4,9 +4,16 @@
 测试SenseVoice模型功能
 """
 
-import requests
+import asyncio
+import contextlib
 import json
 
+from _http import SESSION, TIMEOUT
+
+def report(model, message):
+    """输出一行带模型名前缀的结果；两个请求并发执行，整行一次写出以免输出交错"""
+    print(f"[{model}] {message}\n", end="")
+
 def test_sensevoice_api():
     """测试SenseVoice API"""
     url = "http://127.0.0.1:8000/transcribe"
@@ -18,17 +25,17 @@ def test_sensevoice_api():
     }
     
     try:
-        response = requests.post(url, json=test_data)
-        print(f"状态码: {response.status_code}")
-        print(f"响应: {response.json()}")
+        response = SESSION.post(url, json=test_data, timeout=TIMEOUT)
+        report("SenseVoice", f"状态码: {response.status_code}")
+        report("SenseVoice", f"响应: {response.json()}")
         
         if response.status_code == 200:
-            print("✅ SenseVoice API 测试成功!")
+            report("SenseVoice", "✅ SenseVoice API 测试成功!")
         else:
-            print("❌ SenseVoice API 测试失败")
+            report("SenseVoice", "❌ SenseVoice API 测试失败")
             
     except Exception as e:
-        print(f"❌ 请求失败: {e}")
+        report("SenseVoice", f"❌ 请求失败: {e}")
 
 def test_vosk_api():
     """测试Vosk API作为对比"""
@@ -41,22 +48,27 @@ def test_vosk_api():
     }
     
     try:
-        response = requests.post(url, json=test_data)
-        print(f"状态码: {response.status_code}")
-        print(f"响应: {response.json()}")
+        response = SESSION.post(url, json=test_data, timeout=TIMEOUT)
+        report("Vosk", f"状态码: {response.status_code}")
+        report("Vosk", f"响应: {response.json()}")
         
         if response.status_code == 200:
-            print("✅ Vosk API 测试成功!")
+            report("Vosk", "✅ Vosk API 测试成功!")
         else:
-            print("❌ Vosk API 测试失败")
+            report("Vosk", "❌ Vosk API 测试失败")
             
     except Exception as e:
-        print(f"❌ 请求失败: {e}")
+        report("Vosk", f"❌ 请求失败: {e}")
+
+async def main():
+    """两个模型的转录请求互不依赖，同时发出，总耗时取决于较慢的一个"""
+    await asyncio.gather(
+        asyncio.to_thread(test_sensevoice_api),
+        asyncio.to_thread(test_vosk_api)
+    )
 
 if __name__ == "__main__":
-    print("=== 语音转录API测试 ===")
-    print("\n1. 测试SenseVoice模型:")
-    test_sensevoice_api()
-    
-    print("\n2. 测试Vosk模型:")
-    test_vosk_api()
\ No newline at end of file
+    with contextlib.closing(SESSION):
+        print("=== 语音转录API测试 ===")
+        print("同时测试SenseVoice模型与Vosk模型，输出以模型名为前缀:")
+        asyncio.run(main())
\ No newline at end of file
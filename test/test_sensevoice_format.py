@@ -1,10 +1,24 @@
-import requests
-import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 
-response = requests.post('http://127.0.0.1:8000/transcribe', json={'file_path': 'uploads/test.mp4', 'model': 'sensevoice'})
-data = response.json()
+import orjson
+
+from _cache import cached_post
+from _http import SESSION, TIMEOUT
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--no-cache', action='store_true', help='忽略本地缓存的转录结果，重新请求服务端')
+args = parser.parse_args()
+
+# 请求先在后台线程发出，等待转录期间输出表头，真正需要数据时再取结果
+with ThreadPoolExecutor(max_workers=1) as executor:
+    future = executor.submit(cached_post, SESSION, 'http://127.0.0.1:8000/transcribe',
+                             {'file_path': 'uploads/test.mp4', 'model': 'sensevoice'}, refresh=args.no_cache,
+                             timeout=TIMEOUT)
+    print('SenseVoice response structure:')
+    response = future.result()
+data = orjson.loads(response.content)
 
-print('SenseVoice response structure:')
 print('Keys:', list(data.keys()))
 print('Transcript type:', type(data['transcript']))
 print('Transcript length:', len(data['transcript']) if isinstance(data['transcript'], list) else 'Not a list')
@@ -12,15 +26,20 @@ print('Transcript length:', len(data['transcript']) if isinstance(data['transcri
 if isinstance(data['transcript'], list) and len(data['transcript']) > 0:
     result = data['transcript'][0]
     print('\nFirst result keys:', list(result.keys()))
-    print('Text:', result.get('text', '')[:100] + '...' if len(result.get('text', '')) > 100 else result.get('text', ''))
-    print('Model:', result.get('model', ''))
-    print('Timestamp type:', type(result.get('timestamp', [])))
-    print('Timestamp length:', len(result.get('timestamp', [])))
+    # 各字段只取一次，后续复用局部变量
+    text = result.get('text', '')
+    model = result.get('model', '')
+    timestamps = result.get('timestamp', [])
+    preview = text[:100] + ('...' if len(text) > 100 else '')
+    print('Text:', preview)
+    print('Model:', model)
+    print('Timestamp type:', type(timestamps))
+    print('Timestamp length:', len(timestamps))
     
-    if result.get('timestamp'):
+    if timestamps:
         print('\nFirst few timestamps:')
-        for i, ts in enumerate(result['timestamp'][:5]):
+        for i, ts in enumerate(timestamps[:5]):
             print(f'  {i}: {ts}')
         
-        print('\nText length:', len(result.get('text', '')))
-        print('Timestamp count:', len(result.get('timestamp', [])))
\ No newline at end of file
+        print('\nText length:', len(text))
+        print('Timestamp count:', len(timestamps))
\ No newline at end of file
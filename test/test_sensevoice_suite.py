@@ -0,0 +1,53 @@
+"""
+SenseVoice 转录接口测试套件
+
+将 debug_sensevoice.py、test_sensevoice.py、test_sensevoice_format.py、test_sensevoice_words.py
+中的检查合并为一个pytest模块，共用 conftest.py 中的HTTP会话。需要先启动后端服务，未启动时全部跳过。
+安装 pytest-xdist 后可并发执行，四个请求同时发往服务端：
+
+    pytest -n 4 test/test_sensevoice_suite.py
+"""
+
+import numbers
+
+from _http import TIMEOUT
+
+FILE_PATH = "uploads/test.mp4"  # 相对于后端目录
+REQUIRED_KEYS = frozenset(("word", "start", "end", "conf"))
+
+
+def transcribe(session, base_url, model):
+    """请求转录并检查响应结构，返回词语列表"""
+    response = session.post(f"{base_url}/transcribe", json={"file_path": FILE_PATH, "model": model},
+                            timeout=TIMEOUT)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert "transcript" in data
+    assert isinstance(data["transcript"], list)
+    return data["transcript"]
+
+
+def test_sensevoice_transcribe(session, base_url):
+    transcript = transcribe(session, base_url, "sensevoice")
+    assert transcript, "SenseVoice未返回识别结果"
+
+
+def test_vosk_transcribe(session, base_url):
+    transcript = transcribe(session, base_url, "vosk")
+    assert transcript, "Vosk未返回识别结果"
+
+
+def test_sensevoice_word_keys(session, base_url):
+    transcript = transcribe(session, base_url, "sensevoice")
+    for word_info in transcript:
+        assert isinstance(word_info, dict)
+        missing = REQUIRED_KEYS.difference(word_info)
+        assert not missing, f"缺少必需的键: {sorted(missing)}"
+
+
+def test_sensevoice_timestamps(session, base_url):
+    transcript = transcribe(session, base_url, "sensevoice")
+    for word_info in transcript:
+        start, end = word_info["start"], word_info["end"]
+        assert isinstance(start, numbers.Real) and isinstance(end, numbers.Real)
+        assert 0 <= start <= end, word_info
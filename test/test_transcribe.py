@@ -1,5 +1,14 @@
+import argparse
+
 import requests
 
+from _cache import cached_post
+from _http import SESSION, TIMEOUT
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--no-cache', action='store_true', help='忽略本地缓存的转录结果，重新请求服务端')
+args = parser.parse_args()
+
 url = "http://127.0.0.1:8000/transcribe"
 data = {
     "file_path": "uploads/test.mp4",
@@ -7,7 +16,7 @@ data = {
 }
 
 try:
-    response = requests.post(url, json=data)
+    response = cached_post(SESSION, url, data, refresh=args.no_cache, timeout=TIMEOUT)
     response.raise_for_status()
     transcript = response.json()
     print("转录成功！")
@@ -1,8 +1,12 @@
-import requests
+import argparse
+import contextlib
 import json
 
+from _cache import cached_post
+from _http import SESSION, TIMEOUT
+
 # 测试JSON请求
-def test_json_request():
+def test_json_request(refresh=False):
     url = "http://localhost:8000/transcribe"
     data = {
         "file_path": "uploads/test.mp4",
@@ -14,7 +18,7 @@ def test_json_request():
     }
     
     try:
-        response = requests.post(url, json=data, headers=headers)
+        response = cached_post(SESSION, url, data, refresh=refresh, headers=headers, timeout=TIMEOUT)
         print(f"Status Code: {response.status_code}")
         print(f"Response: {response.text}")
         
@@ -27,5 +31,10 @@ def test_json_request():
         print(f"❌ 请求异常: {e}")
 
 if __name__ == "__main__":
-    print("测试修复后的转录API...")
-    test_json_request()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--no-cache', action='store_true', help='忽略本地缓存的转录结果，重新请求服务端')
+    args = parser.parse_args()
+    
+    with contextlib.closing(SESSION):
+        print("测试修复后的转录API...")
+        test_json_request(refresh=args.no_cache)
\ No newline at end of file
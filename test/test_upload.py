@@ -1,15 +1,33 @@
+import mimetypes
+import os
+
 import requests
 
-url = "http://127.0.0.1:8000/upload"
-files = {'file': open('E:/f5_tts/AutoReader_new/AutoReader/resources/ref_voice/读书男声2.WAV', 'rb')}
+from _http import SESSION, TIMEOUT
 
+# 可选依赖：安装 requests-toolbelt 后以流式multipart上传，文件按块从磁盘读出直接发送，
+# 不必先整体读入内存；未安装时回退到 requests 的 files 参数
 try:
-    response = requests.post(url, files=files)
-    response.raise_for_status()  # Raise an exception for bad status codes
-    print("上传成功！")
-    print(response.json())
-except requests.exceptions.RequestException as e:
-    print(f"上传失败: {e}")
-finally:
-    for file in files.values():
-        file.close()
\ No newline at end of file
+    from requests_toolbelt.multipart.encoder import MultipartEncoder
+    TOOLBELT_AVAILABLE = True
+except ImportError:
+    TOOLBELT_AVAILABLE = False
+
+url = "http://127.0.0.1:8000/upload"
+file_path = 'E:/f5_tts/AutoReader_new/AutoReader/resources/ref_voice/读书男声2.WAV'
+file_name = os.path.basename(file_path)
+content_type = mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+
+with open(file_path, 'rb') as f:
+    try:
+        if TOOLBELT_AVAILABLE:
+            encoder = MultipartEncoder(fields={'file': (file_name, f, content_type)})
+            response = SESSION.post(url, data=encoder, headers={'Content-Type': encoder.content_type},
+                                    timeout=TIMEOUT)
+        else:
+            response = SESSION.post(url, files={'file': (file_name, f, content_type)}, timeout=TIMEOUT)
+        response.raise_for_status()  # Raise an exception for bad status codes
+        print("上传成功！")
+        print(response.json())
+    except requests.exceptions.RequestException as e:
+        print(f"上传失败: {e}")